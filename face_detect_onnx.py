@@ -0,0 +1,229 @@
+#######################
+## Leaflet technology
+## ONNX Runtime CPU backend for the YOLOv8 face detector
+########################
+import numpy as np
+import cv2
+import logging
+import os
+import sys
+import json
+import time
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+
+class LeafletFaceDetectOnnx:
+    """
+    YOLOv8 face detector running on ONNX Runtime (CPU).
+
+    The ultralytics .pt model is exported to ONNX next to the weights on first
+    use; with quantized=True an int8 copy is produced as well and used instead.
+    detect() has the same contract as LeafletFaceDetectImage._run_detector:
+    a list of PIL images in, [(xyxy, confidence), ...] out.
+    """
+
+    def __init__(self, model_path, quantized=False, intra_op_threads=None, imgsz=640,
+                 conf=0.25, iou=0.7, max_det=300, calibration_images=None, logger=None):
+        self.model_path = model_path
+        self.quantized = quantized
+        self.intra_op_threads = intra_op_threads
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+        self.calibration_images = calibration_images
+        self.logger = logger
+        self.session = None
+        self.input_name = None
+        self.onnx_path = None
+
+    def logs(self, msg):
+        if(self.logger):
+            self.logger.debug(msg)
+
+    def export_onnx(self):
+        """Export the .pt weights to ONNX (dynamic batch) unless already exported."""
+        onnx_path = os.path.splitext(self.model_path)[0] + ".onnx"
+        if not os.path.exists(onnx_path):
+            from ultralytics import YOLO
+            self.logs(f"[ONNX]: exporting {self.model_path}")
+            onnx_path = YOLO(self.model_path).export(format="onnx", imgsz=self.imgsz, dynamic=True, simplify=True)
+        return onnx_path
+
+    def quantize_int8(self, onnx_path):
+        """
+        Produce an int8 copy of onnx_path. Static QDQ quantization is used when
+        calibration images are configured, dynamic weight-only quantization otherwise.
+        """
+        int8_path = os.path.splitext(onnx_path)[0] + "-int8.onnx"
+        if os.path.exists(int8_path):
+            return int8_path
+
+        from onnxruntime import quantization
+        self.logs(f"[ONNX]: quantizing {onnx_path}")
+        if self.calibration_images:
+            quantization.quantize_static(onnx_path, int8_path, _CalibrationReader(self, onnx_path),
+                                         quant_format=quantization.QuantFormat.QDQ,
+                                         weight_type=quantization.QuantType.QInt8)
+        else:
+            quantization.quantize_dynamic(onnx_path, int8_path, weight_type=quantization.QuantType.QUInt8)
+        return int8_path
+
+    def load(self):
+        """Export/quantize as needed and open the ONNX Runtime session."""
+        if ort is None:
+            raise RuntimeError("onnxruntime is not installed; use the torch face detect backend.")
+
+        onnx_path = self.export_onnx()
+        if self.quantized:
+            onnx_path = self.quantize_int8(onnx_path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.intra_op_threads:
+            options.intra_op_num_threads = int(self.intra_op_threads)
+        self.session = ort.InferenceSession(onnx_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.onnx_path = onnx_path
+        self.logs(f"[ONNX]: session ready {onnx_path}")
+        return self
+
+    def _letterbox(self, image):
+        """Resize keeping aspect ratio and pad to imgsz x imgsz, as ultralytics does."""
+        array = np.asarray(image.convert("RGB"))
+        h, w = array.shape[:2]
+        ratio = min(self.imgsz / h, self.imgsz / w)
+        new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+        if (new_w, new_h) != (w, h):
+            array = cv2.resize(array, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        dw, dh = (self.imgsz - new_w) / 2, (self.imgsz - new_h) / 2
+        top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+        left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+        array = cv2.copyMakeBorder(array, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+        return array, ratio, left, top
+
+    @staticmethod
+    def _nms(boxes, scores, iou_threshold):
+        order = scores.argsort()[::-1]
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        keep = []
+        while order.size > 0:
+            i = order[0]
+            keep.append(i)
+            xx1 = np.maximum(boxes[i, 0], boxes[order[1:], 0])
+            yy1 = np.maximum(boxes[i, 1], boxes[order[1:], 1])
+            xx2 = np.minimum(boxes[i, 2], boxes[order[1:], 2])
+            yy2 = np.minimum(boxes[i, 3], boxes[order[1:], 3])
+            inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+            overlap = inter / (areas[i] + areas[order[1:]] - inter + 1e-9)
+            order = order[1:][overlap <= iou_threshold]
+        return np.array(keep, dtype=np.int64)
+
+    def detect(self, images):
+        """One ONNX Runtime run over a list of PIL images."""
+        if self.session is None:
+            self.load()
+
+        prepared = [self._letterbox(image) for image in images]
+        batch = np.stack([p[0] for p in prepared]).transpose(0, 3, 1, 2).astype(np.float32) / 255.0
+        outputs = self.session.run(None, {self.input_name: batch})[0]
+
+        detections = []
+        for prediction, (array, ratio, left, top), image in zip(outputs, prepared, images):
+            prediction = prediction.T
+            scores = prediction[:, 4:].max(axis=1)
+            mask = scores > self.conf
+            prediction, scores = prediction[mask], scores[mask]
+            if len(scores) == 0:
+                detections.append((np.zeros((0, 4), dtype=np.float32), np.zeros((0,), dtype=np.float32)))
+                continue
+
+            cx, cy, bw, bh = prediction[:, 0], prediction[:, 1], prediction[:, 2], prediction[:, 3]
+            boxes = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)
+            keep = self._nms(boxes, scores, self.iou)[:self.max_det]
+            boxes, scores = boxes[keep], scores[keep]
+
+            boxes[:, [0, 2]] = (boxes[:, [0, 2]] - left) / ratio
+            boxes[:, [1, 3]] = (boxes[:, [1, 3]] - top) / ratio
+            width, height = image.size
+            boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+            boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+            detections.append((boxes.astype(np.float32), scores.astype(np.float32)))
+        return detections
+
+
+class _CalibrationReader:
+    """Feeds letterboxed calibration images to onnxruntime static quantization."""
+
+    def __init__(self, detector, onnx_path):
+        from PIL import Image
+        session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+        input_name = session.get_inputs()[0].name
+        self._batches = iter([
+            {input_name: detector._letterbox(Image.open(path))[0].transpose(2, 0, 1)[None].astype(np.float32) / 255.0}
+            for path in detector.calibration_images
+        ])
+
+    def get_next(self):
+        return next(self._batches, None)
+
+
+def _box_iou(box1, box2):
+    xx1, yy1 = max(box1[0], box2[0]), max(box1[1], box2[1])
+    xx2, yy2 = min(box1[2], box2[2]), min(box1[3], box2[3])
+    inter = max(0.0, xx2 - xx1) * max(0.0, yy2 - yy1)
+    union = (box1[2] - box1[0]) * (box1[3] - box1[1]) + (box2[2] - box2[0]) * (box2[3] - box2[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def parity_check(model_path, image_paths, quantized=False, intra_op_threads=None, min_iou=0.9):
+    """
+    Compare ONNX Runtime boxes against the PyTorch (ultralytics) path.
+
+    Every PyTorch box is matched to its best ONNX box by IoU. An image passes
+    when the face counts agree and every match has IoU >= min_iou.
+    Returns a dict with per-image results and per-backend latency.
+    """
+    from PIL import Image
+    from ultralytics import YOLO
+    from supervision import Detections
+
+    torch_model = YOLO(model_path)
+    onnx_model = LeafletFaceDetectOnnx(model_path, quantized=quantized, intra_op_threads=intra_op_threads).load()
+    report = {"onnx_model": onnx_model.onnx_path, "min_iou": min_iou, "images": [], "passed": True,
+              "torch_seconds": 0.0, "onnx_seconds": 0.0}
+
+    for path in image_paths:
+        image = Image.open(path).convert("RGB")
+        started = time.perf_counter()
+        torch_boxes = Detections.from_ultralytics(torch_model(image, verbose=False)[0]).xyxy
+        report["torch_seconds"] += time.perf_counter() - started
+        started = time.perf_counter()
+        onnx_boxes = onnx_model.detect([image])[0][0]
+        report["onnx_seconds"] += time.perf_counter() - started
+
+        ious = [max((_box_iou(t, o) for o in onnx_boxes), default=0.0) for t in torch_boxes]
+        passed = len(torch_boxes) == len(onnx_boxes) and all(iou >= min_iou for iou in ious)
+        report["passed"] = report["passed"] and passed
+        report["images"].append({
+            "image": path,
+            "torch_faces": len(torch_boxes),
+            "onnx_faces": len(onnx_boxes),
+            "min_iou": round(min(ious), 4) if ious else None,
+            "passed": passed
+        })
+
+    report["torch_seconds"] = round(report["torch_seconds"], 4)
+    report["onnx_seconds"] = round(report["onnx_seconds"], 4)
+    return report
+
+
+if __name__ == "__main__":
+    ## python face_detect_onnx.py <model.pt> <image> [<image> ...] [--int8]
+    arguments = [a for a in sys.argv[1:] if a != "--int8"]
+    result = parity_check(arguments[0], arguments[1:], quantized="--int8" in sys.argv)
+    print(json.dumps(result, indent=4))
@@ -7,21 +7,176 @@
 from ultralytics import YOLO
 from supervision import Detections
 from deepface import DeepFace
+from face_embedding_cache import LeafletFaceEmbeddingCache
+from face_detect_onnx import LeafletFaceDetectOnnx
 import logging
 from PIL import Image
+import numpy as np
+import base64
+import binascii
+import io
 import os
 import sys
 import json
 import random
+import threading
+import time
+import uuid
+import datetime
 
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 #os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 
+DEFAULT_FACE_MODEL_PATH = r"yolo_models/arnabdharYOLOv8-Face-Detection.pt"
+## How one face is picked when the detector returns several
+FACE_POLICIES = ("largest", "confidence", "center")
+## Longest side of the copy the detector sees; boxes map back to the original
+DEFAULT_DETECT_MAX_SIDE = 1280
+
+
+class LeafletFaceModelRegistry:
+    """
+    Process-wide registry of YOLO face models.
+
+    A model is loaded once per worker process and shared by every
+    LeafletFaceDetectImage instance. Ultralytics predictors are not
+    thread-safe, so inference on a shared model is serialized through
+    the per-model lock returned by inference_lock().
+
+    The inference backend is chosen per deployment with configure():
+    "torch" (ultralytics, default), "onnx" or "onnx-int8" (ONNX Runtime CPU).
+    """
+    BACKENDS = ("torch", "onnx", "onnx-int8")
+    _models = {}
+    _infer_locks = {}
+    _states = {}
+    _load_lock = threading.Lock()
+    _backend = "torch"
+    _intra_op_threads = None
+
+    @classmethod
+    def configure(cls, backend="torch", intra_op_threads=None):
+        """Select the inference backend; models already loaded are dropped."""
+        backend = (backend or "torch").lower()
+        if backend not in cls.BACKENDS:
+            raise ValueError(f"Unknown face detect backend: {backend}")
+        with cls._load_lock:
+            cls._backend = backend
+            cls._intra_op_threads = intra_op_threads
+            cls._models.clear()
+            cls._infer_locks.clear()
+            cls._states.clear()
+
+    @staticmethod
+    def _key(model_path):
+        if(model_path is None or model_path == ""):
+            model_path = DEFAULT_FACE_MODEL_PATH
+        return os.path.abspath(model_path)
+
+    @classmethod
+    def get_model(cls, model_path=None, logger=None):
+        """Return the shared YOLO model for model_path, loading it on first use."""
+        key = cls._key(model_path)
+        model = cls._models.get(key)
+        if model is not None:
+            return model
+
+        with cls._load_lock:
+            model = cls._models.get(key)
+            if model is not None:
+                return model
+
+            cls._states[key] = {"state": "loading", "load_seconds": None, "error": None}
+            started = time.perf_counter()
+            try:
+                if cls._backend == "torch":
+                    model = YOLO(key)
+                else:
+                    model = LeafletFaceDetectOnnx(key, quantized=(cls._backend == "onnx-int8"),
+                                                  intra_op_threads=cls._intra_op_threads, logger=logger).load()
+            except Exception as e:
+                cls._states[key] = {"state": "failed", "load_seconds": None, "error": str(e)}
+                if(logger):
+                    logger.error(f"[FACE-MODEL]: load failed {key}: {e}")
+                raise
+
+            cls._infer_locks[key] = threading.Lock()
+            cls._models[key] = model
+            cls._states[key] = {
+                "state": "loaded",
+                "backend": cls._backend,
+                "load_seconds": round(time.perf_counter() - started, 3),
+                "error": None
+            }
+            if(logger):
+                logger.debug(f"[FACE-MODEL]: loaded {key} in {cls._states[key]['load_seconds']}s")
+            return model
+
+    @classmethod
+    def inference_lock(cls, model_path=None):
+        """Lock guarding inference on the shared model for model_path."""
+        key = cls._key(model_path)
+        cls.get_model(key)
+        return cls._infer_locks[key]
+
+    @classmethod
+    def warm_up(cls, model_path=None, logger=None):
+        """
+        Load the model and run one dummy inference so the predictor is set up
+        before the first real request. Returns True when the model is warm.
+        """
+        key = cls._key(model_path)
+        try:
+            model = cls.get_model(key, logger)
+            if isinstance(model, LeafletFaceDetectOnnx):
+                model.detect([Image.new("RGB", (640, 640))])
+            else:
+                with cls._infer_locks[key]:
+                    model(Image.new("RGB", (640, 640)), verbose=False)
+            cls._states[key]["state"] = "warm"
+            if(logger):
+                logger.debug(f"[FACE-MODEL]: warm {key}")
+            return True
+        except Exception as e:
+            if(logger):
+                logger.error(f"[FACE-MODEL]: warm up failed {key}: {e}")
+            return False
+
+    @classmethod
+    def warm_up_async(cls, model_path=None, logger=None):
+        """Warm the model on a daemon thread so worker startup is not blocked."""
+        worker = threading.Thread(target=cls.warm_up, args=(model_path, logger), daemon=True)
+        worker.start()
+        return worker
+
+    @classmethod
+    def is_warm(cls, model_path=None):
+        key = cls._key(model_path)
+        return cls._states.get(key, {}).get("state") == "warm"
+
+    @classmethod
+    def status(cls):
+        """Warm/cold state of every model known to this worker."""
+        summary = {}
+        for key, state in list(cls._states.items()):
+            summary[key] = dict(state)
+        default_key = cls._key(None)
+        if default_key not in summary:
+            summary[default_key] = {"state": "cold", "load_seconds": None, "error": None}
+        return {"pid": os.getpid(), "backend": cls._backend, "models": summary}
+
+
 class LeafletFaceDetectImage:    
-    def __init__(self, model_path: str, logger):
+    def __init__(self, model_path: str, logger=None, embedding_cache=None, face_policy="largest",
+                 detect_max_side=DEFAULT_DETECT_MAX_SIDE):
         self.model_path = model_path
         self.logger = logger
+        self.detect_max_side = detect_max_side
+        self.embedding_cache = embedding_cache or LeafletFaceEmbeddingCache.shared()
+        if face_policy not in FACE_POLICIES:
+            raise ValueError(f"Unknown face policy: {face_policy}")
+        self.face_policy = face_policy
     
     def logs(self, msg):
         logger = self.logger
@@ -29,21 +184,144 @@ class LeafletFaceDetectImage:
           logger.debug(msg)
           
           
-    def get_face_image_path(self, image_path, save_path):
+    @staticmethod
+    def decode_base64_image(base64_string):
+        """Decode a (data-URL or plain) base64 image into raw bytes and an RGB PIL image."""
+        clean_base64 = base64_string
+        if base64_string.startswith('data:'):
+            clean_base64 = base64_string.split(',', 1)[1]
+        try:
+            image_bytes = base64.b64decode(clean_base64)
+        except binascii.Error as e:
+            raise ValueError(f"Invalid base64 image: {e}")
+        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+        return image_bytes, image
+
+    def _downscale(self, image):
+        """
+        Bounded-size copy of image for detection and the (x, y) factors that map
+        its boxes back to the original. Small images are returned as-is.
+        """
+        width, height = image.size
+        longest = max(width, height)
+        if not self.detect_max_side or longest <= self.detect_max_side:
+            return image, (1.0, 1.0)
+        ratio = self.detect_max_side / longest
+        size = (max(1, int(round(width * ratio))), max(1, int(round(height * ratio))))
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        small = image.resize(size, Image.BILINEAR, reducing_gap=2.0)
+        return small, (width / size[0], height / size[1])
+
+    def _run_detector(self, images):
+        """
+        One forward pass over a list of PIL images.
+        Returns [(xyxy, confidence), ...] numpy arrays, one pair per image,
+        with boxes in the coordinates of the original (full resolution) image.
+        """
+        if(self.model_path is None or self.model_path == ""):
+           self.model_path = DEFAULT_FACE_MODEL_PATH
+        scaled = [self._downscale(image) for image in images]
+        inputs = [small for small, factors in scaled]
+        model = LeafletFaceModelRegistry.get_model(self.model_path, self.logger)
+        if isinstance(model, LeafletFaceDetectOnnx):
+            ## ONNX Runtime sessions are safe to run concurrently
+            detections = model.detect(inputs)
+        else:
+            with LeafletFaceModelRegistry.inference_lock(self.model_path):
+                outputs = model(inputs, verbose=False)
+            detections = []
+            for output in outputs:
+                results = Detections.from_ultralytics(output)
+                detections.append((results.xyxy, results.confidence))
+
+        rescaled = []
+        for (boxes, confidence), image, (small, (factor_x, factor_y)) in zip(detections, images, scaled):
+            if len(boxes) > 0 and (factor_x != 1.0 or factor_y != 1.0):
+                width, height = image.size
+                boxes = np.asarray(boxes, dtype=np.float32) * np.array([factor_x, factor_y, factor_x, factor_y], dtype=np.float32)
+                boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+                boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+            rescaled.append((boxes, confidence))
+        return rescaled
+
+    def select_face(self, boxes, confidence, image_size, policy=None):
+        """
+        Index of the one face to use from a detections array, or None.
+        largest: biggest box area, confidence: highest score,
+        center: box centre closest to the image centre.
+        """
+        if len(boxes) == 0:
+            return None
+        policy = policy or self.face_policy
+        if len(boxes) == 1:
+            return 0
+        boxes = np.asarray(boxes)
+        if policy == "confidence" and confidence is not None:
+            return int(np.argmax(confidence))
+        if policy == "center":
+            width, height = image_size
+            centres_x = (boxes[:, 0] + boxes[:, 2]) / 2 - width / 2
+            centres_y = (boxes[:, 1] + boxes[:, 3]) / 2 - height / 2
+            return int(np.argmin(centres_x ** 2 + centres_y ** 2))
+        return int(np.argmax((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])))
+
+    def detect_face_box(self, image, policy=None):
+        """Selected face box [x1, y1, x2, y2] and its confidence, or (None, None). No crop, no encode."""
+        boxes, confidence = self._run_detector([image])[0]
+        index = self.select_face(boxes, confidence, image.size, policy)
+        if index is None:
+            return None, None
+        score = float(confidence[index]) if confidence is not None else None
+        return [float(v) for v in boxes[index]], score
+
+    def detect_face_array(self, image, policy=None):
+        """
+        Run the shared detector on a PIL image and return the face crop as an
+        RGB numpy array, or None when no face is found. Nothing touches disk.
+        """
+        box, score = self.detect_face_box(image, policy)
+        if box is None:
+            return None
+        return np.asarray(image.crop(tuple(box)))
+
+    def detect_faces_batch(self, images, batch_size=16, return_crops=False):
+        """
+        Detect faces in many PIL images, batch_size images per forward pass.
+        Returns one dict per image with its boxes and confidences and, when
+        return_crops is set, the detected face as base64 PNG.
+        """
+        results = []
+        for start in range(0, len(images), batch_size):
+            chunk = images[start:start + batch_size]
+            for image, (boxes, confidence) in zip(chunk, self._run_detector(chunk)):
+                item = {
+                    "faces": len(boxes),
+                    "boxes": [[round(float(v), 2) for v in box] for box in boxes],
+                    "confidence": [round(float(c), 4) for c in confidence] if confidence is not None else []
+                }
+                index = self.select_face(boxes, confidence, image.size)
+                item["selected"] = index
+                if return_crops:
+                    item["crop"] = None
+                    if index is not None:
+                        buffer = io.BytesIO()
+                        image.crop(tuple(boxes[index])).save(buffer, format="PNG")
+                        item["crop"] = base64.b64encode(buffer.getvalue()).decode()
+                results.append(item)
+        self.logs(f"[BATCH]: detected {len(images)} image(s)")
+        return results
+
+    def get_face_image_path(self, image_path, save_path, policy=None):
             
         ### ==> model_path = hf_hub_download(repo_id="arnabdhar/YOLOv8-Face-Detection", filename="model.pt")         
         #r"C:\Users\leaflet_javaVB_delhi\Workspace\rajeshbisht\pythonTesting\yolomodel/arnabdharYOLOv8-Face-Detection.pt"
         face_imagepath = save_path
-        if(self.model_path is None or self.model_path == ""):
-           self.model_path = r"yolo_models/arnabdharYOLOv8-Face-Detection.pt"
         #print(f"model pat before loading: {self.model_path}")
-        model = YOLO(self.model_path)
-        model.save()
         image = Image.open(image_path) 
         name_without_ext = os.path.splitext(os.path.basename(image_path))[0]
         #saved_image_name = name_without_ext + "_faceDetect.png"
-        output = model(image)
-        results = Detections.from_ultralytics(output[0])
+        box, score = self.detect_face_box(image, policy)
         dir_names = None
         if os.path.isdir(face_imagepath):
             dir_names = face_imagepath
@@ -54,8 +332,8 @@ class LeafletFaceDetectImage:
         ###save_path = "detected_faces"
         #face_imagepath = os.path.join(save_path, f"{saved_image_name}")
         #
-        for i, (x1, y1, x2, y2) in enumerate(results.xyxy):        
-            face = image.crop((x1, y1, x2, y2))        
+        if box is not None:
+            face = image.crop(tuple(box))        
             face.save(face_imagepath)
 
         return face_imagepath
@@ -69,7 +347,7 @@ class LeafletFaceDetectImage:
                 "message": ""
             }
         try:
-            result = DeepFace.verify(img1_path, img2_path, model_name="ArcFace")
+            result = self.embedding_cache.verify(img1_path, img2_path)
             self.logs("After verified.") 
             ##print(f"result: {result}")
             status = result["verified"]
@@ -124,6 +402,59 @@ class LeafletFaceDetectImage:
             }
 
 
+    def face_embedding(self, image):
+        """Detect the face in a PIL image and return its cached ArcFace embedding."""
+        face_crop = self.detect_face_array(image)
+        if face_crop is None:
+            raise ValueError("Face could not be detected in the image.")
+        return self.embedding_cache.get_embedding(np.ascontiguousarray(face_crop[:, :, ::-1]))
+
+    def face_detect_and_identity_blob(self, id_base64, face_base64, audit_dir=None):
+        """
+        In-memory variant of face_detect_and_identity for base64 inputs.
+        Images flow as arrays from decode through YOLO crop to ArcFace embedding;
+        set audit_dir to also persist the inputs and crops for audit.
+        """
+        self.logs("[START]: Face detect and identity blob.")
+        try:
+            id_bytes, id_image = self.decode_base64_image(id_base64)
+            face_bytes, face_image = self.decode_base64_image(face_base64)
+            id_crop = self.detect_face_array(id_image)
+            if id_crop is None:
+                raise ValueError("Face could not be detected in the ID image.")
+            face_crop = self.detect_face_array(face_image)
+            if face_crop is None:
+                raise ValueError("Face could not be detected in the face image.")
+
+            if audit_dir:
+                self.save_audit_images(audit_dir, id_bytes, face_bytes, id_crop, face_crop)
+
+            ## DeepFace expects BGR arrays
+            result = self.face_identity(np.ascontiguousarray(id_crop[:, :, ::-1]),
+                                        np.ascontiguousarray(face_crop[:, :, ::-1]))
+            self.logs("[END]: Face detect and identity blob.")
+            return result
+        except Exception as e:
+            self.logs(f"[EXP]: Face detect and identity blob. {e}")
+            return {
+                "status": False,
+                "message": str(e)
+            }
+
+    def save_audit_images(self, audit_dir, id_bytes, face_bytes, id_crop, face_crop):
+        """Persist request images and detected crops under a unique audit folder."""
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        folder = os.path.join(audit_dir, f"audit_{timestamp}_{str(uuid.uuid4())[:8]}")
+        os.makedirs(folder, exist_ok=True)
+        for name, image_bytes in (("base", id_bytes), ("face", face_bytes)):
+            image_format = (Image.open(io.BytesIO(image_bytes)).format or "png").lower()
+            with open(os.path.join(folder, f"{name}.{image_format}"), 'wb') as f:
+                f.write(image_bytes)
+        Image.fromarray(id_crop).save(os.path.join(folder, "base_face_detect.png"))
+        Image.fromarray(face_crop).save(os.path.join(folder, "face_face_detect.png"))
+        self.logs(f"[AUDIT]: {folder}")
+        return folder
+
     def write_text_file(self, file_path, content):
         with open(file_path, 'w', encoding='utf-8') as file:
              file.write(str(content))    
@@ -135,7 +466,7 @@ def debugWrite(file_path, content):
              
 if __name__ == "__main__":        
     arguments = sys.argv
-    model_path = r"yolo_models/arnabdharYOLOv8-Face-Detection.pt"
+    model_path = DEFAULT_FACE_MODEL_PATH
     image1_path = r"F:\IISsites\PythonSP\FACE_IDENTITY\base.png"
     image2_path = r"F:\IISsites\PythonSP\FACE_IDENTITY\face.png"
     result_path = "F:\IISsites\PythonSP\FACE_IDENTITY"
@@ -0,0 +1,198 @@
+#######################
+## Leaflet technology
+## ArcFace embedding cache for face identity
+########################
+from deepface import DeepFace
+from collections import OrderedDict
+import numpy as np
+import hashlib
+import threading
+import time
+import os
+
+## DeepFace default cosine threshold for ArcFace
+ARCFACE_COSINE_THRESHOLD = 0.68
+
+
+class LeafletFaceEmbeddingCache:
+    """
+    Computes ArcFace embeddings once and keeps them keyed by image content hash.
+
+    Embeddings live in a bounded in-memory LRU. Spilling is opt-in: when
+    spill_dir is set, entries evicted from memory are written there as .npy
+    files and read back on a later miss. Spilled files are biometric
+    templates, so they are kept at most spill_ttl seconds and spill_max_items
+    files (checked at most every spill_prune_interval seconds). Vectors are
+    stored L2-normalised; cosine distance is 1 - dot.
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_items=512, spill_dir=None, spill_max_items=10000, spill_ttl=24 * 3600,
+                 spill_prune_interval=60, model_name="ArcFace", logger=None):
+        self.max_items = max_items
+        self.spill_dir = spill_dir
+        self.spill_max_items = spill_max_items
+        self.spill_ttl = spill_ttl
+        self.spill_prune_interval = spill_prune_interval
+        self.model_name = model_name
+        self.logger = logger
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._spill_pruned_at = 0
+        self.hits = 0
+        self.misses = 0
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    @classmethod
+    def shared(cls):
+        """Process-wide cache used by LeafletFaceDetectImage."""
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    @classmethod
+    def configure_shared(cls, max_items=512, spill_dir=None, spill_max_items=10000, spill_ttl=24 * 3600, logger=None):
+        with cls._shared_lock:
+            cls._shared = cls(max_items=max_items, spill_dir=spill_dir, spill_max_items=spill_max_items,
+                              spill_ttl=spill_ttl, logger=logger)
+        return cls._shared
+
+    def logs(self, msg):
+        if(self.logger):
+            self.logger.debug(msg)
+
+    @staticmethod
+    def content_key(image):
+        """sha256 of the image content: file bytes for a path, pixels for an array."""
+        digest = hashlib.sha256()
+        if isinstance(image, np.ndarray):
+            digest.update(str(image.shape).encode())
+            digest.update(str(image.dtype).encode())
+            digest.update(np.ascontiguousarray(image).data)
+        else:
+            with open(image, 'rb') as f:
+                while chunk := f.read(1024 * 1024):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, f"{key}.npy")
+
+    def get(self, key):
+        with self._lock:
+            vector = self._items.get(key)
+            if vector is not None:
+                self._items.move_to_end(key)
+                return vector
+
+        if self.spill_dir and os.path.exists(self._spill_path(key)):
+            try:
+                if time.time() - os.path.getmtime(self._spill_path(key)) > self.spill_ttl:
+                    return None
+                vector = np.load(self._spill_path(key))
+                self.put(key, vector)
+                return vector
+            except Exception as e:
+                self.logs(f"[EMBEDDING]: spill read failed {key}: {e}")
+        return None
+
+    def put(self, key, vector):
+        evicted = []
+        with self._lock:
+            self._items[key] = vector
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                evicted.append(self._items.popitem(last=False))
+
+        if self.spill_dir:
+            for old_key, old_vector in evicted:
+                try:
+                    np.save(self._spill_path(old_key), old_vector)
+                except Exception as e:
+                    self.logs(f"[EMBEDDING]: spill write failed {old_key}: {e}")
+            if evicted:
+                self._prune_spill()
+
+    def _prune_spill(self):
+        """Drop spilled files older than spill_ttl, then the oldest beyond spill_max_items."""
+        now = time.time()
+        with self._lock:
+            if now - self._spill_pruned_at < self.spill_prune_interval:
+                return
+            self._spill_pruned_at = now
+        try:
+            entries = sorted((entry.stat().st_mtime, entry.path) for entry in os.scandir(self.spill_dir)
+                             if entry.name.endswith(".npy"))
+        except OSError as e:
+            self.logs(f"[EMBEDDING]: spill scan failed: {e}")
+            return
+        expired = [path for mtime, path in entries if now - mtime > self.spill_ttl]
+        kept = len(entries) - len(expired)
+        if kept > self.spill_max_items:
+            expired += [path for mtime, path in entries[len(expired):len(expired) + kept - self.spill_max_items]]
+        for path in expired:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        if expired:
+            self.logs(f"[EMBEDDING]: pruned {len(expired)} spilled embeddings")
+
+    def _represent(self, image):
+        faces = DeepFace.represent(image, model_name=self.model_name)
+        if len(faces) > 1:
+            faces = sorted(faces, key=lambda f: f["facial_area"]["w"] * f["facial_area"]["h"], reverse=True)
+        vector = np.asarray(faces[0]["embedding"], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+        return vector
+
+    def get_embedding(self, image, key=None):
+        """
+        Normalised ArcFace embedding for an image path or BGR numpy array.
+        Only computed when the content hash is not cached yet.
+        """
+        if key is None:
+            key = self.content_key(image)
+        vector = self.get(key)
+        with self._lock:
+            if vector is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if vector is not None:
+            return vector
+
+        vector = self._represent(image)
+        self.put(key, vector)
+        self.logs(f"[EMBEDDING]: computed {key[:12]}")
+        return vector
+
+    @staticmethod
+    def cosine_distance(vector1, vector2):
+        return float(1.0 - np.dot(vector1, vector2))
+
+    def verify(self, image1, image2, threshold=ARCFACE_COSINE_THRESHOLD):
+        """Same shape as the DeepFace.verify fields used by face_identity."""
+        distance = self.cosine_distance(self.get_embedding(image1), self.get_embedding(image2))
+        return {
+            "verified": distance <= threshold,
+            "distance": distance,
+            "threshold": threshold,
+            "model": self.model_name,
+            "distance_metric": "cosine"
+        }
+
+    def stats(self):
+        return {
+            "items": len(self._items),
+            "max_items": self.max_items,
+            "hits": self.hits,
+            "misses": self.misses,
+            "spill_dir": self.spill_dir
+        }
@@ -0,0 +1,251 @@
+#######################
+## Leaflet technology
+## 1:N face gallery of ArcFace embeddings
+########################
+import numpy as np
+import threading
+import time
+import json
+import os
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+    import fcntl
+
+GALLERY_VECTORS_FILE = "gallery_vectors_{capacity}.f32"
+GALLERY_INDEX_FILE = "gallery_index.json"
+GALLERY_ENTRIES_FILE = "gallery_entries.jsonl"
+GALLERY_LOCK_FILE = "gallery.lock"
+
+
+class _GalleryFileLock:
+    """Exclusive lock on a file shared by every worker process (msvcrt on Windows, flock elsewhere)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a+b")
+        if msvcrt:
+            self._file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.01)
+        else:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if msvcrt:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+
+
+class LeafletFaceGallery:
+    """
+    Persistent gallery of enrolled face embeddings with cosine top-k search.
+
+    Embeddings are L2-normalised float32 rows of one memory-mapped matrix, so
+    a search is a single matrix-vector product over the enrolled rows. The
+    matrix grows by doubling into a new file, so workers still mapping the
+    old one are never truncated under. Person ids and metadata are appended
+    one line per enrollment to a JSONL file; a small JSON header records the
+    current matrix file. Enrollment holds a file lock across worker
+    processes, and other workers read only the lines appended since their
+    last look.
+    """
+
+    def __init__(self, gallery_dir, dim=512, initial_capacity=1024, logger=None):
+        self.gallery_dir = gallery_dir
+        self.dim = dim
+        self.initial_capacity = initial_capacity
+        self.logger = logger
+        self.vectors_path = None
+        self.index_path = os.path.join(gallery_dir, GALLERY_INDEX_FILE)
+        self.entries_path = os.path.join(gallery_dir, GALLERY_ENTRIES_FILE)
+        self.lock_path = os.path.join(gallery_dir, GALLERY_LOCK_FILE)
+        self._lock = threading.RLock()
+        self._vectors = None
+        self._ids = []
+        self._meta = []
+        self._capacity = 0
+        self._index_mtime = None
+        self._entries_offset = 0
+        os.makedirs(gallery_dir, exist_ok=True)
+        with self._lock, _GalleryFileLock(self.lock_path):
+            if not os.path.exists(self.index_path):
+                self._create()
+            self._load()
+
+    def logs(self, msg):
+        if(self.logger):
+            self.logger.debug(msg)
+
+    def _create(self):
+        self._capacity = self.initial_capacity
+        self.vectors_path = os.path.join(self.gallery_dir, GALLERY_VECTORS_FILE.format(capacity=self._capacity))
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="w+",
+                                  shape=(self._capacity, self.dim))
+        self._save_index()
+
+    def _load(self):
+        """Map the matrix named by the header if it changed, then read new entries."""
+        with self._lock:
+            mtime = os.path.getmtime(self.index_path)
+            if mtime != self._index_mtime:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                self.dim = index["dim"]
+                self._capacity = index["capacity"]
+                self._index_mtime = mtime
+                self.vectors_path = os.path.join(self.gallery_dir, index["vectors_file"])
+                self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+",
+                                          shape=(self._capacity, self.dim))
+            self._read_entries()
+
+    def _read_entries(self):
+        if not os.path.exists(self.entries_path) or os.path.getsize(self.entries_path) == self._entries_offset:
+            return
+        with open(self.entries_path, 'rb') as f:
+            f.seek(self._entries_offset)
+            chunk = f.read()
+        ## a line still being appended by another worker is picked up next time
+        complete = chunk[:chunk.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            entry = json.loads(line)
+            if entry["row"] != len(self._ids):
+                raise ValueError(f"Gallery entries out of order at row {entry['row']}")
+            self._ids.append(entry["id"])
+            self._meta.append(entry["meta"])
+        self._entries_offset += len(complete)
+
+    def _reload_if_changed(self):
+        if (os.path.getmtime(self.index_path) != self._index_mtime
+                or (os.path.exists(self.entries_path) and os.path.getsize(self.entries_path) != self._entries_offset)):
+            self.logs("[GALLERY]: gallery changed on disk, reloading")
+            self._load()
+
+    def _save_index(self):
+        """Header only (matrix file and capacity); rewritten on create and grow."""
+        index = {
+            "dim": self.dim,
+            "capacity": self._capacity,
+            "vectors_file": os.path.basename(self.vectors_path)
+        }
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(temp_path, self.index_path)
+        self._index_mtime = os.path.getmtime(self.index_path)
+
+    def _grow(self, min_capacity):
+        capacity = self._capacity
+        while capacity < min_capacity:
+            capacity *= 2
+        vectors_path = os.path.join(self.gallery_dir, GALLERY_VECTORS_FILE.format(capacity=capacity))
+        vectors = np.memmap(vectors_path, dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        vectors[:self._capacity] = self._vectors
+        vectors.flush()
+
+        old_path = self.vectors_path
+        del self._vectors
+        self._vectors = vectors
+        self.vectors_path = vectors_path
+        self._capacity = capacity
+        self._save_index()
+        try:
+            os.remove(old_path)
+        except OSError:
+            ## still mapped by another worker (Windows); the stale file is harmless
+            pass
+        self.logs(f"[GALLERY]: capacity grown to {capacity}")
+
+    def enroll(self, person_id, vector, meta=None):
+        """Append one embedding for person_id and return its row number."""
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if vector.shape[0] != self.dim:
+            raise ValueError(f"Embedding has {vector.shape[0]} dimensions, gallery expects {self.dim}")
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+
+        ## reload -> write row -> flush -> append entry, as one step across processes
+        with self._lock, _GalleryFileLock(self.lock_path):
+            self._load()
+            row = len(self._ids)
+            if row >= self._capacity:
+                self._grow(row + 1)
+            self._vectors[row] = vector
+            self._vectors.flush()
+            line = (json.dumps({"row": row, "id": str(person_id), "meta": meta or {}}) + "\n").encode("utf-8")
+            with open(self.entries_path, 'ab') as f:
+                f.write(line)
+            self._ids.append(str(person_id))
+            self._meta.append(meta or {})
+            self._entries_offset += len(line)
+        self.logs(f"[GALLERY]: enrolled {person_id} at row {row}")
+        return row
+
+    def search(self, vector, top_k=5, threshold=None):
+        """
+        Best matching enrolled persons for an embedding, best first.
+        Each person appears once with their best scoring enrollment.
+        threshold is a maximum cosine distance.
+        """
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+
+        with self._lock:
+            self._reload_if_changed()
+            count = len(self._ids)
+            if count == 0:
+                return []
+            scores = self._vectors[:count] @ vector
+            ids = self._ids
+            meta = self._meta
+
+        top_k = max(1, int(top_k))
+        ## over-fetch so several enrollments of one person do not crowd out others
+        fetch = min(count, top_k * 4)
+        candidates = np.argpartition(-scores, fetch - 1)[:fetch]
+        candidates = candidates[np.argsort(-scores[candidates])]
+
+        matches = []
+        seen = set()
+        for row in candidates:
+            person_id = ids[row]
+            distance = float(1.0 - scores[row])
+            if person_id in seen:
+                continue
+            if threshold is not None and distance > threshold:
+                break
+            seen.add(person_id)
+            matches.append({
+                "person_id": person_id,
+                "similarity": round(float(scores[row]), 4),
+                "distance": round(distance, 4),
+                "meta": meta[row]
+            })
+            if len(matches) >= top_k:
+                break
+        return matches
+
+    def stats(self):
+        return {
+            "enrolled": len(self._ids),
+            "persons": len(set(self._ids)),
+            "capacity": self._capacity,
+            "dim": self.dim
+        }
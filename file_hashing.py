@@ -0,0 +1,195 @@
+#######################
+## Leaflet technology
+## Incremental file hashing shared by PDF signing and /api/md5hash
+########################
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import hashlib
+import threading
+import base64
+import mmap
+import io
+import os
+
+SUPPORTED_ALGORITHMS = ("md5", "sha1", "sha256", "sha512")
+## Files at least this large hash each algorithm on its own thread
+PARALLEL_HASH_MIN_SIZE = 32 * 1024 * 1024
+MMAP_HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def new_digests(algorithms):
+    return {name: hashlib.new(name) for name in algorithms}
+
+
+def _update_from_view(digest, view):
+    for offset in range(0, len(view), MMAP_HASH_CHUNK_SIZE):
+        digest.update(view[offset:offset + MMAP_HASH_CHUNK_SIZE])
+    return digest.hexdigest()
+
+
+def hash_file(file_path, algorithms=("md5",), executor=None):
+    """
+    Hex digests of a file in one pass over a read-only memory map.
+    Large files hash every algorithm on its own executor thread; hashlib
+    releases the GIL while it digests, so the algorithms run in parallel.
+    """
+    for name in algorithms:
+        if name not in SUPPORTED_ALGORITHMS:
+            raise ValueError(f"Unsupported hash algorithm: {name}")
+    digests = new_digests(algorithms)
+    if os.path.getsize(file_path) == 0:
+        return {name: digest.hexdigest() for name, digest in digests.items()}
+
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            if executor is not None and len(digests) > 1 and len(view) >= PARALLEL_HASH_MIN_SIZE:
+                names = list(digests)
+                hexdigests = executor.map(lambda name: _update_from_view(digests[name], view), names)
+                return dict(zip(names, hexdigests))
+            for offset in range(0, len(view), MMAP_HASH_CHUNK_SIZE):
+                chunk = view[offset:offset + MMAP_HASH_CHUNK_SIZE]
+                for digest in digests.values():
+                    digest.update(chunk)
+                chunk.release()
+            return {name: digest.hexdigest() for name, digest in digests.items()}
+        finally:
+            view.release()
+
+
+class LeafletFileDigestEngine:
+    """
+    Multi-algorithm file digests with a result cache.
+
+    Results are cached per (absolute path, size, mtime) so an unchanged file
+    is never hashed twice; asking for an extra algorithm later only hashes
+    that one. The thread pool is shared by every request in the process.
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_items=1024, max_workers=4, logger=None):
+        self.max_items = max_items
+        self.logger = logger
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="digest")
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    @classmethod
+    def configure_shared(cls, max_items=1024, max_workers=4, logger=None):
+        with cls._shared_lock:
+            cls._shared = cls(max_items=max_items, max_workers=max_workers, logger=logger)
+        return cls._shared
+
+    def logs(self, msg):
+        if(self.logger):
+            self.logger.debug(msg)
+
+    @staticmethod
+    def file_key(file_path):
+        stat = os.stat(file_path)
+        return (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+    def digest(self, file_path, algorithms=("md5",)):
+        """{algorithm: hexdigest} for file_path."""
+        key = self.file_key(file_path)
+        with self._lock:
+            cached = self._items.get(key, {})
+            if cached:
+                self._items.move_to_end(key)
+            missing = [name for name in algorithms if name not in cached]
+            if not missing:
+                self.hits += 1
+                return {name: cached[name] for name in algorithms}
+            self.misses += 1
+
+        computed = hash_file(file_path, missing, executor=self.executor)
+        self.logs(f"[DIGEST]: {key[0]} {missing}")
+        with self._lock:
+            entry = self._items.setdefault(key, {})
+            entry.update(computed)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+            return {name: entry[name] for name in algorithms}
+
+    def stats(self):
+        return {"items": len(self._items), "max_items": self.max_items,
+                "hits": self.hits, "misses": self.misses}
+
+
+class LeafletHashingWriter(io.RawIOBase):
+    """
+    Write-only tee for signed output.
+
+    Every write is passed to the optional sink (e.g. the output file) and
+    fed to the digests and an incremental base64 encoder, so the hashes and
+    blob are ready as soon as the writer finishes, without reading the file
+    back. Chunks go to the sink, digests and encoder as memoryviews, never
+    copied. It reports readable()/seekable() False, so pyhanko still
+    finishes the document in its own buffer and copies it here in chunks:
+    this saves the read-back of the signed file, not pyhanko's buffer.
+    """
+
+    def __init__(self, sink=None, algorithms=("md5", "sha256"), encode_base64=True):
+        super().__init__()
+        self.sink = sink
+        self.size = 0
+        self._digests = new_digests(algorithms)
+        self._encode_base64 = encode_base64
+        self._base64_parts = []
+        self._carry = b""
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        with memoryview(data) as view:
+            view = view.cast("B")
+            if self.sink is not None:
+                self.sink.write(view)
+            for digest in self._digests.values():
+                digest.update(view)
+            self.size += len(view)
+            if self._encode_base64:
+                self._encode(view)
+            return len(view)
+
+    def _encode(self, view):
+        """Encode whole 3-byte groups now, carry the remainder (at most 2 bytes) to the next write."""
+        if self._carry:
+            fill = min(3 - len(self._carry), len(view))
+            self._carry += bytes(view[:fill])
+            view = view[fill:]
+            if len(self._carry) < 3:
+                return
+            self._base64_parts.append(base64.b64encode(self._carry).decode())
+            self._carry = b""
+        cut = len(view) - len(view) % 3
+        if cut:
+            self._base64_parts.append(base64.b64encode(view[:cut]).decode())
+        self._carry = bytes(view[cut:])
+
+    def flush(self):
+        if self.sink is not None and not self.sink.closed:
+            self.sink.flush()
+
+    def hexdigests(self):
+        return {name: digest.hexdigest() for name, digest in self._digests.items()}
+
+    def hexdigest(self, name="md5"):
+        return self._digests[name].hexdigest()
+
+    def base64(self):
+        """The base64 encoding of everything written so far."""
+        return "".join(self._base64_parts) + base64.b64encode(self._carry).decode()
@@ -173,29 +173,69 @@ def openvidu_delete_session():
 ############ Face detection no need : import anything in this file #####
 import random
 import time
-from face_detect_yolo import LeafletFaceDetectImage
+from PIL import Image
+from face_detect_yolo import LeafletFaceDetectImage, LeafletFaceModelRegistry
+from face_embedding_cache import LeafletFaceEmbeddingCache
+from face_gallery import LeafletFaceGallery
 
 ## @Virtual environment python executable path 
 ENOTARY_ENV_EXE_PATH = r"F:\IISsites\notary_vir_env\Scripts\python.exe"
 ## @python script file path
 FACE_DETECT_SCRIPTS_PATH = "face_detect_yolo.py"
+## @YOLO face model, loaded once per worker and shared by all face routes
+FACE_MODEL_PATH = r"yolo_models/arnabdharYOLOv8-Face-Detection.pt"
+## @Face detect backend per deployment: torch | onnx | onnx-int8 (ONNX Runtime CPU)
+FACE_DETECT_BACKEND = os.environ.get("FACE_DETECT_BACKEND", "torch")
+FACE_DETECT_INTRA_OP_THREADS = int(os.environ.get("FACE_DETECT_INTRA_OP_THREADS", "0")) or None
+LeafletFaceModelRegistry.configure(FACE_DETECT_BACKEND, FACE_DETECT_INTRA_OP_THREADS)
+LeafletFaceModelRegistry.warm_up_async(FACE_MODEL_PATH, logger)
+## @ArcFace embeddings shared across requests, in memory only unless spilling is enabled
+## @Spilled embeddings are biometric templates: capped by count and age
+FACE_EMBEDDING_SPILL = os.environ.get("FACE_EMBEDDING_SPILL", "false").lower() == "true"
+FACE_EMBEDDING_SPILL_DIR = os.path.join(FACE_IDENTITY, "embeddings") if FACE_EMBEDDING_SPILL else None
+FACE_EMBEDDING_SPILL_MAX_ITEMS = int(os.environ.get("FACE_EMBEDDING_SPILL_MAX_ITEMS", "10000"))
+FACE_EMBEDDING_SPILL_TTL = int(os.environ.get("FACE_EMBEDDING_SPILL_TTL", str(24 * 3600)))
+## @Blob face identity runs in memory; set True (or send auditMode) to keep images on disk
+FACE_AUDIT_MODE = False
+## @Images per YOLO forward pass on the batch endpoint
+FACE_DETECT_BATCH_SIZE = 16
+## @Largest batchSize a request may ask for; bounds decoded images held per chunk
+FACE_DETECT_BATCH_SIZE_MAX = int(os.environ.get("FACE_DETECT_BATCH_SIZE_MAX", "64"))
+## @Longest image side fed to the detector (0 = full resolution); crops stay full resolution
+FACE_DETECT_MAX_SIDE = int(os.environ.get("FACE_DETECT_MAX_SIDE", "1280"))
+## @1:N gallery of returning signers (memory-mapped embeddings)
+FACE_GALLERY = LeafletFaceGallery(os.path.join(FACE_IDENTITY, "gallery"), logger=logger)
+LeafletFaceEmbeddingCache.configure_shared(max_items=1024, spill_dir=FACE_EMBEDDING_SPILL_DIR,
+                                           spill_max_items=FACE_EMBEDDING_SPILL_MAX_ITEMS,
+                                           spill_ttl=FACE_EMBEDDING_SPILL_TTL, logger=logger)
+
+def new_face_detector(data=None):
+    data = data or {}
+    return LeafletFaceDetectImage(model_path=FACE_MODEL_PATH, logger=logger,
+                                  face_policy=data.get('facePolicy', 'largest'),
+                                  detect_max_side=int(data.get('detectMaxSide', FACE_DETECT_MAX_SIDE)))
+
+@app.route('/api/notary/face-model/status', methods=['GET'])
+def face_model_status():
+    status = LeafletFaceModelRegistry.status()
+    status['warm'] = LeafletFaceModelRegistry.is_warm(FACE_MODEL_PATH)
+    status['embedding_cache'] = LeafletFaceEmbeddingCache.shared().stats()
+    return jsonify(status)
 
 @app.route('/api/notary/blob/face-detect', methods=['POST'])
 def face_crop_blob():
     logger.error("face crop blob: api called")
     try:
+        data = request.get_json()
         imageBase64Content = data.get('imageBase64Content')
-        image_path1 = create_image_path_from_base4Str(FACE_IDENTITY, imageBase64Content, "detect")
-        timestamp_part = str(int(time.time()))[-4:]
-        random_part = str(random.randint(10, 99))
-        random_folder = timestamp_part + random_part
-        saved_path = os.path.join(FACE_IDENTITY, random_folder, "face_detect.png")
-        model_path = r"yolo_models/arnabdharYOLOv8-Face-Detection.pt"
-        ov = LeafletFaceDetectImage(model_path=model_path, logger=logger)
-        imagename =  ov.get_face_image_path(image_path, saved_path)
-        blob_64encode = get_base64_file(output_filename)
-        if os.path.exists(saved_path):
-           return jsonify({
+        ov = new_face_detector(data)
+        image_bytes, image = ov.decode_base64_image(imageBase64Content)
+        face_crop = ov.detect_face_array(image)
+        if face_crop is not None:
+            buffer = io.BytesIO()
+            Image.fromarray(face_crop).save(buffer, format="PNG")
+            blob_64encode = base64.b64encode(buffer.getvalue()).decode()
+            return jsonify({
                 'status': True,
                 'imagepath': blob_64encode
             })
@@ -204,7 +244,7 @@ def face_crop_blob():
                 'status': False,
                 'imagepath': "not detected."
             })    
-    except:
+    except Exception as e:
         logger.error(f"face crop blob exp: {str(e)}")
         return jsonify({'status': 'error', 'imagepath': str(e)}), 500
     
@@ -216,12 +256,19 @@ def face_crop_from_image():
         data = request.get_json()
         image_path = data.get('imagepath')
         save_dir = data.get('savedir')        
+        ov = new_face_detector(data)
+        if str(data.get('coordinatesOnly', False)).lower() == "true":
+            box, score = ov.detect_face_box(Image.open(image_path))
+            return jsonify({
+                'status': str(box is not None).lower(),
+                'box': box,
+                'confidence': score
+            })
+
         timestamp_part = str(int(time.time()))[-4:]
         random_part = str(random.randint(10, 99))
         random_folder = timestamp_part + random_part
         saved_path = os.path.join(save_dir, random_folder, "face_detect.png")
-        model_path = r"yolo_models/arnabdharYOLOv8-Face-Detection.pt"
-        ov = LeafletFaceDetectImage(model_path=model_path)
         imagename =  ov.get_face_image_path(image_path, saved_path)
         if os.path.exists(saved_path):
             return jsonify({
@@ -239,6 +286,51 @@ def face_crop_from_image():
         return jsonify({'status': 'error', 'imagepath': str(e)}), 500
 
 
+@app.route('/api/notary/face-detect/batch', methods=['POST'])
+def face_detect_batch():
+    logger.info("face_detect_batch: api called")
+    try:
+        data = request.get_json()
+        items = data.get('images') or []
+        return_crops = str(data.get('returnCrops', False)).lower() == "true"
+        try:
+            batch_size = int(data.get('batchSize', FACE_DETECT_BATCH_SIZE))
+        except (TypeError, ValueError):
+            batch_size = 0
+        if not 1 <= batch_size <= FACE_DETECT_BATCH_SIZE_MAX:
+            return jsonify({'status': 'error', 'message': f'batchSize must be an integer from 1 to {FACE_DETECT_BATCH_SIZE_MAX}'}), 400
+        ov = new_face_detector(data)
+
+        results = [None] * len(items)
+        detected_count = 0
+        ## decode one chunk at a time so large archives are never fully held in memory
+        for start in range(0, len(items), batch_size):
+            images = []
+            positions = []
+            for index in range(start, min(start + batch_size, len(items))):
+                item = items[index]
+                try:
+                    images.append(load_face_request_image(ov, item))
+                    positions.append(index)
+                except Exception as e:
+                    results[index] = {"index": index, "status": False, "message": str(e)}
+
+            if images:
+                detected = ov.detect_faces_batch(images, batch_size=batch_size, return_crops=return_crops)
+                for index, item in zip(positions, detected):
+                    item["index"] = index
+                    item["status"] = item["faces"] > 0
+                    results[index] = item
+                detected_count += len(images)
+
+        logger.info(f"face_detect_batch: {detected_count} of {len(items)} image(s) processed")
+        return jsonify({'status': True, 'results': results})
+
+    except Exception as e:
+        logger.error(f"Exception => face_detect_batch : {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
 @app.route('/api/notary/face-identity', methods=['POST'])
 def face_identity_check():
     logger.error("face_identity_check: api called") 
@@ -252,8 +344,7 @@ def face_identity_check():
         random_part = str(random.randint(10, 99))
         random_folder = timestamp_part + random_part
         saved_path = os.path.join(save_dir, random_folder, "faceIdentity.txt")
-        model_path = r"yolo_models/arnabdharYOLOv8-Face-Detection.pt"
-        ov = LeafletFaceDetectImage(model_path=model_path)     
+        ov = new_face_detector(data)
         result_status = ov.face_identity(image_path1, image_path2)
         logger.error(f"result_status => face_identity_check: {result_status}")           
         return result_status
@@ -267,24 +358,14 @@ def face_identity_check():
 def identity_check_face_blob():
     logger.info("START API CALL]: identity check face blob") 
     status = False 
-    image_path1 = 'img-1'
-    image_path2 = 'img-2'
     try:
         data = request.get_json()
         idBase64Content = data.get('idBase64Content')
         faceBase64Content = data.get('faceBase64Content')
-        image_path1 = create_image_path_from_base4Str(FACE_IDENTITY, idBase64Content, "base")
-        logger.debug(f"face identity blob: image path-1: {image_path1}")
-        image_path2 = create_image_path_from_base4Str(FACE_IDENTITY, faceBase64Content, "face")
-        logger.debug(f"face identity blob: image_path2: {image_path2}")
-        save_dir = os.path.dirname(image_path2)
-        timestamp_part = str(int(time.time()))[-4:]
-        random_part = str(random.randint(10, 99))
-        random_folder = timestamp_part + random_part
-        saved_path = os.path.join(save_dir, random_folder, "faceIdentity.txt")
-        model_path = r"yolo_models/arnabdharYOLOv8-Face-Detection.pt"
-        ov = LeafletFaceDetectImage(model_path=model_path, logger=logger)     
-        status = ov.face_detect_and_identity(image_path1, image_path2)
+        audit_mode = str(data.get('auditMode', FACE_AUDIT_MODE)).lower() == "true"
+        audit_dir = FACE_IDENTITY if audit_mode else None
+        ov = new_face_detector(data)
+        status = ov.face_detect_and_identity_blob(idBase64Content, faceBase64Content, audit_dir=audit_dir)
         logger.debug(f"Status => identity check face blob: {status}")
         return status
         
@@ -292,6 +373,53 @@ def identity_check_face_blob():
         logger.error(f"Exception =>identity check face blob: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
   
+def load_face_request_image(ov, data):
+    if data.get('imageBase64Content'):
+        image_bytes, image = ov.decode_base64_image(data.get('imageBase64Content'))
+        return image
+    return Image.open(data.get('imagepath')).convert("RGB")
+
+
+@app.route('/api/notary/face-gallery/enroll', methods=['POST'])
+def face_gallery_enroll():
+    logger.info("face_gallery_enroll: api called")
+    try:
+        data = request.get_json()
+        person_id = data.get('personId')
+        if not person_id:
+            return jsonify({'status': False, 'message': "personId is required."}), 400
+        ov = new_face_detector(data)
+        vector = ov.face_embedding(load_face_request_image(ov, data))
+        row = FACE_GALLERY.enroll(person_id, vector, data.get('meta'))
+        return jsonify({'status': True, 'personId': person_id, 'row': row})
+    except Exception as e:
+        logger.error(f"Exception => face_gallery_enroll : {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
+@app.route('/api/notary/face-search', methods=['POST'])
+def face_gallery_search():
+    logger.info("face_gallery_search: api called")
+    try:
+        data = request.get_json()
+        try:
+            top_k = int(data.get('topK', 5))
+        except (TypeError, ValueError):
+            top_k = 0
+        if top_k < 1:
+            return jsonify({'status': False, 'message': "topK must be an integer of at least 1."}), 400
+        threshold = data.get('threshold')
+        ov = new_face_detector(data)
+        vector = ov.face_embedding(load_face_request_image(ov, data))
+        started = time.perf_counter()
+        matches = FACE_GALLERY.search(vector, top_k=top_k, threshold=float(threshold) if threshold is not None else None)
+        search_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(f"face_gallery_search: {len(matches)} match(es) in {search_ms} ms")
+        return jsonify({'status': True, 'matches': matches, 'search_ms': search_ms, 'gallery': FACE_GALLERY.stats()})
+    except Exception as e:
+        logger.error(f"Exception => face_gallery_search : {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
 ######################## END Face detection #####################
 ################### BEGIN: Enotary Seal #####################
 
@@ -302,23 +430,41 @@ import time
 import logging
 from notary_seal_circle import LeafletNotarySeal
 from notary_seal_rect import LeafletNotaryStampGeneratorCairo
+from seal_render_cache import LeafletSealRenderCache, seal_cache_key
+from seal_bulk_render import LeafletSealRenderPool, base64_result, archive_name
+import zipfile
+
+## @Rendered seals keyed by their parameters: memory LRU + bounded disk tier
+SEAL_RENDER_CACHE = LeafletSealRenderCache(cache_dir="seal_cache", logger=logger)
+
+## @sealFormat -> mimetype; svg/pdf are Cairo vector surfaces, png the raster default
+SEAL_FORMATS = {"png": "image/png", "svg": "image/svg+xml", "pdf": "application/pdf"}
+
+## @Bulk seal rendering: process pool size (0 = cpu count) and request cap
+SEAL_BULK_WORKERS = int(os.environ.get("SEAL_BULK_WORKERS", "0")) or None
+SEAL_BULK_MAX_ITEMS = 2000
+LeafletSealRenderPool.configure(SEAL_BULK_WORKERS)
 
 
 @app.route('/api/notary/seal-create', methods=['POST'])
 def enotary_seal_creation():
     logger.info("Start enotary_seal_creation")
-    #outdir = Path("seal_output")
-    outdir = "seal_output"
-    os.makedirs(outdir, exist_ok=True)
-    #outdir.mkdir(parents=True, exist_ok=True)
     request_json = {}
     
     try:
         data = request.get_json()
-        data['outDir'] = outdir
         sealStyle = data.get('sealStyle')
-        logger.info(f"enotary_seal_creation sealStyle : {sealStyle}")
-        data['outDir'] = outdir
+        sealFormat = str(data.get('sealFormat', 'png')).lower()
+        logger.info(f"enotary_seal_creation sealStyle : {sealStyle} sealFormat : {sealFormat}")
+        if sealFormat not in SEAL_FORMATS:
+            return jsonify({'status': 'Invalid format of seal.', 'outpath': ' '})
+        data['sealFormat'] = sealFormat
+        cache_key = seal_cache_key(sealStyle, data)
+        cached_seal = SEAL_RENDER_CACHE.get(cache_key, ext=sealFormat)
+        if cached_seal is not None:
+            logger.debug(f"enotary_seal_creation cache hit: {cache_key}.{sealFormat}")
+            return seal_response(data, cached_seal)
+        data['cacheKey'] = cache_key
         if(sealStyle.lower()== "circle"):
             return circle_enotary_seal_creation(data)
         elif(sealStyle.lower()=="rectangle"):
@@ -331,86 +477,113 @@ def enotary_seal_creation():
 
 
 ############# NOTARY SEAL CREATION -- HELPER FUNCTION ##################
+def seal_response(data, seal_bytes):
+    """
+    Seal straight from memory in data['sealFormat'] (png default): the raw file
+    when responseType is file (or png, kept for older callers), base64 JSON otherwise.
+    """
+    seal_format = data.get('sealFormat', 'png')
+    if str(data.get('responseType', 'base64')).lower() in ("file", "png"):
+        return send_file(io.BytesIO(seal_bytes), mimetype=SEAL_FORMATS[seal_format],
+                         download_name=f'notarySeal.{seal_format}')
+    return jsonify({
+        'status': str(True),
+        'sealFormat': seal_format,
+        'outpath': base64.b64encode(seal_bytes).decode()
+    })
+
+
 def circle_enotary_seal_creation(data):    
-    random_part = str(random.randint(100000, 900000))
-    create_status = False 
     blob_64encode = None   
     try:        
-        outDir = data.get('outDir')
-        output_filename = os.path.join(outDir, f"notarySeal_{random_part}.png")
-        data['upperCircleText'] = data['sealUpperText']
-        data['lowerCircleText'] = data['sealLowerText']
         upper_circle_text = data.get('sealUpperText')
         lower_circle_text = data.get('sealLowerText')
         notaryId = data.get('notaryId')
         expireOn = data.get('expireOn')        
-        data['outFile'] = output_filename         
-        json_str = json.dumps(data)
+        sealFormat = data.get('sealFormat', 'png')
         clobj = LeafletNotarySeal()
-        response = clobj.mainprocess(logger, json_str)
-        resp_Str = json.dumps(response)
-        logger.debug(f"Circle Seal response=> {resp_Str}")
-        
-        if os.path.exists(output_filename):
-            blob_64encode = get_base64_file(output_filename)
-            create_status = True
-            return jsonify({
-                'status': str(create_status),
-                'outpath': blob_64encode
-            })
-        else:
-            return jsonify({
-                'status': str(create_status),
-                'outpath': ' '
-            }), 500
+        seal_bytes = clobj.render_seal_bytes(upper_circle_text, lower_circle_text, notaryId, expireOn, seal_format=sealFormat)
+        logger.debug(f"Circle Seal rendered => {sealFormat} {len(seal_bytes)} bytes")
+        if data.get('cacheKey'):
+            SEAL_RENDER_CACHE.put(data['cacheKey'], seal_bytes, ext=sealFormat)
+        return seal_response(data, seal_bytes)
             
     except Exception as e:
+        logger.error(f"Seal render exception => {str(e)}")
         return jsonify({
                 'status': str(e),
                 'outpath': blob_64encode
-            })
+            }), 500
 
 
 def rectangle_notary_seal_creation(data):
     logger.debug(f"Request notary_seal_rect_creation")
-    random_part = str(random.randint(100000, 900000))
-    create_status = False
     blob_64encode = None   
     
     try:
-        data['topCurevedText'] = data['sealUpperText'] 
-        data['bottomCurvedText'] = data['sealLowerText'] 
-        data['notaryName'] = data['sealName']
-        outDir = data.get('outDir')
-        output_filename = os.path.join(outDir, f"notarySealRect_{random_part}.png")                
-        data['outFile'] = output_filename 
-        json_str = json.dumps(data)
-        logger.debug(f"notary_seal_rect_creation : json_str=> {json_str}")
-        logger.debug(f"Rectangle Seal json_str => {json_str}")
-        objNotaryClass = LeafletNotaryStampGeneratorCairo(width=600, height=250)
-        resp = objNotaryClass.main_process(logger, json_str)
-       
-        if os.path.exists(output_filename):
-            blob_64encode = get_base64_file(output_filename)
-            create_status = True
-            return jsonify({
-                'status': str(create_status),
-                'outpath': blob_64encode
-            })
-        else:
-            return jsonify({
-                'status': str(create_status),
-                'outpath': blob_64encode
-            }), 500
+        sealFormat = data.get('sealFormat', 'png')
+        objNotaryClass = LeafletNotaryStampGeneratorCairo(width=600, height=250, seal_format=sealFormat)
+        seal_bytes = objNotaryClass.render_seal_bytes(data['sealUpperText'], data['sealLowerText'],
+                                                      data['sealName'], data['notaryId'], data['expireOn'])
+        logger.debug(f"Rectangle Seal rendered => {sealFormat} {len(seal_bytes)} bytes")
+        if data.get('cacheKey'):
+            SEAL_RENDER_CACHE.put(data['cacheKey'], seal_bytes, ext=sealFormat)
+        return seal_response(data, seal_bytes)
             
     except Exception as e:
+        logger.error(f"Seal render exception => {str(e)}")
         return jsonify({
                 'status': str(e),
                 'outpath': blob_64encode
-            })
+            }), 500
  
 ##################### End ENOTARY SEAL -- HELPER FUNCTIONS  #############################
 
+@app.route('/api/notary/seal-create/bulk', methods=['POST'])
+def enotary_seal_bulk_creation():
+    """
+    Render a list of seal specs (circle and rectangle mixed, same fields as
+    /api/notary/seal-create) across the render process pool.
+    responseType ndjson (default) streams one base64 result per line as each
+    seal completes; zip returns the seals as files plus results.json.
+    """
+    logger.info("Start enotary_seal_bulk_creation")
+    try:
+        data = request.get_json()
+        seals = data.get('seals') or []
+        responseType = str(data.get('responseType', 'ndjson')).lower()
+        if not seals:
+            return jsonify({'status': 'error', 'message': 'seals list is required'}), 400
+        if len(seals) > SEAL_BULK_MAX_ITEMS:
+            return jsonify({'status': 'error', 'message': f'At most {SEAL_BULK_MAX_ITEMS} seals per request'}), 400
+        logger.info(f"enotary_seal_bulk_creation seals : {len(seals)} responseType : {responseType}")
+
+        results = LeafletSealRenderPool.render_many(seals, cache=SEAL_RENDER_CACHE, logger=logger, formats=SEAL_FORMATS)
+        if responseType == "zip":
+            buffer = io.BytesIO()
+            summary = []
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for result in results:
+                    content = result.pop('content', None)
+                    if content is not None:
+                        result['filename'] = archive_name(result)
+                        archive.writestr(result['filename'], content)
+                    summary.append(result)
+                summary.sort(key=lambda r: r['index'])
+                archive.writestr('results.json', json.dumps(summary, indent=4))
+            buffer.seek(0)
+            return send_file(buffer, mimetype='application/zip', download_name='notarySeals.zip')
+
+        def generate():
+            for result in results:
+                yield json.dumps(base64_result(result)) + "\n"
+        return Response(generate(), mimetype='application/x-ndjson')
+
+    except Exception as e:
+        logger.error(f"enotary_seal_bulk_creation exception => {str(e)}")
+        return jsonify({'status': 'error', 'outpath': str(e)}), 500
+
+
 
 @app.route('/api/notary/seal-create/circle', methods=['POST'])
 def notary_seal_creation():    
@@ -580,22 +753,45 @@ def edgar_information():
 
 ####### Gennerate MD5 Hashcode #################
 import hashlib
+from file_hashing import LeafletFileDigestEngine
+## @One digest cache per process, shared with the PDF signer
+DIGEST_ENGINE = LeafletFileDigestEngine.configure_shared(logger=logger)
 def get_md5_hash(file_path):
     try:
-        md5_hash = hashlib.md5()    
-        with open(file_path, 'rb') as f:        
-            while chunk := f.read(8192):
-                md5_hash.update(chunk)
-        
-        return md5_hash.hexdigest()
+        return DIGEST_ENGINE.digest(file_path, ("md5",))["md5"]
     except Exception as e:
         return str(e)
 
+def get_file_digests(file_path, algorithms):
+    try:
+        digests = DIGEST_ENGINE.digest(file_path, algorithms)
+        return {"filepath": file_path, "hashvalue": digests.get("md5"), "digests": digests}
+    except Exception as e:
+        return {"filepath": file_path, "error": str(e)}
+
 @app.route('/api/md5hash', methods=['POST'])
 def get_file_md5hash():
+    """
+    {filepath} -> {hashvalue} (MD5) as before. With algorithms (md5, sha1,
+    sha256, sha512) and/or a filepaths list, every file is digested in one
+    pass per file and results are cached by (path, size, mtime).
+    """
     try:
         data = request.get_json()
         file_path = data.get('filepath')
+        algorithms = data.get('algorithms') or ["md5"]
+        if isinstance(algorithms, str):
+            ## "sha256" or "md5,sha256"
+            algorithms = algorithms.split(",")
+        algorithms = tuple(name.strip().lower() for name in algorithms)
+        if data.get('filepaths'):
+            results = [get_file_digests(path, algorithms) for path in data.get('filepaths')]
+            logger.debug(f"Files: {len(results)} => digests {algorithms}")
+            return jsonify({"results": results})
+        if data.get('algorithms'):
+            result = get_file_digests(file_path, algorithms)
+            logger.debug(f"File: {file_path} => digests {result}")
+            return jsonify(result)
         hash_code = get_md5_hash(file_path)
         logger.debug(f"File: {file_path} => MD5 Hash Code: {hash_code}")
         return jsonify({"hashvalue": hash_code})
@@ -677,50 +873,195 @@ def transform_list_to_dict(extracted_data):
 #         return jsonify({"error": str(e)})
         
  ################### PDF file Signed ######################
-from pdf_file_sign import LeafletPDFDigitalSigner
+from pdf_file_sign import LeafletPDFDigitalSigner, LeafletSignerPool
+from pdf_sign_jobs import LeafletSignJobQueue
+import queue
+
+## @Loaded PKCS#12 signers are reused across requests for this many seconds
+PDF_SIGNER_POOL_TTL = int(os.environ.get("PDF_SIGNER_POOL_TTL", "3600"))
+LeafletSignerPool.configure(PDF_SIGNER_POOL_TTL)
+## @RFC 3161 TSAs tried in order; an endpoint failing repeatedly is skipped for a while
+PDF_SIGN_TSA_URLS = os.environ.get("PDF_SIGN_TSA_URLS", "http://timestamp.identrust.com,http://timestamp.digicert.com")
+## @Batch signing: concurrent files per request and files per request
+PDF_SIGN_BATCH_WORKERS = int(os.environ.get("PDF_SIGN_BATCH_WORKERS", "4"))
+PDF_SIGN_BATCH_MAX_ITEMS = 100
+## @Async signing jobs: background workers and how many jobs may wait
+PDF_SIGN_JOB_WORKERS = int(os.environ.get("PDF_SIGN_JOB_WORKERS", "4"))
+PDF_SIGN_JOB_QUEUE_DEPTH = int(os.environ.get("PDF_SIGN_JOB_QUEUE_DEPTH", "200"))
+PDF_SIGN_JOBS = LeafletSignJobQueue(workers=PDF_SIGN_JOB_WORKERS, max_queue=PDF_SIGN_JOB_QUEUE_DEPTH,
+                                    result_dir="sign_jobs", logger=logger)
+
+def new_pdf_signer(data):
+    """LeafletPDFDigitalSigner from the signer fields shared by the sign endpoints."""
+    return LeafletPDFDigitalSigner(
+        pfx_path=data.get('pfx_path'),
+        pfx_password=data.get('pfx_password').encode('utf-8'),
+        tsa_url=data.get('tsa_url') or PDF_SIGN_TSA_URLS,
+        field_name=data.get('field_name'),
+        signer_name=data.get('signer_name'),
+        reason=data.get('reason'),
+        location=data.get('location'),
+        contact_info=data.get('contact_info')
+    )
+
+def pdf_sign_input(item):
+    """A batch entry: URL/local path string, or {input_pdf_file} / {input_pdf_base64}."""
+    if isinstance(item, dict):
+        if item.get('input_pdf_base64'):
+            return base64.b64decode(item.get('input_pdf_base64'))
+        return item.get('input_pdf_file')
+    return item
+
+def pdf_sign_job(data, input_pdf_file):
+    """
+    Runs on a job worker: signer setup, download, signing and TSA all happen here.
+    The result keeps the signed file's path, not its base64; it is served by
+    /api/pdf/sign/jobs/<job_id>/file.
+    """
+    return new_pdf_signer(data).sign_input(input_pdf_file, include_blob=False)
+
+def submit_pdf_sign_job(data, input_pdf_file):
+    try:
+        job_id = PDF_SIGN_JOBS.submit(pdf_sign_job, data, input_pdf_file)
+    except queue.Full:
+        logger.error(f"PDF sign job queue full ({PDF_SIGN_JOB_QUEUE_DEPTH})")
+        return jsonify({'status': 'error', 'message': 'Signing queue is full, retry later'}), 429
+    return jsonify({'status': 'queued', 'job_id': job_id,
+                    'status_url': f'/api/pdf/sign/jobs/{job_id}'}), 202
+
 @app.route('/api/pdf/appysign', methods=['POST'])
 def pdf_file_applysign():
     try:
         data = request.get_json()
-        pfx_path = data.get('pfx_path')        
-        pfx_password = data.get('pfx_password')
-        field_name = data.get('field_name')
-        signer_name = data.get('signer_name')
-        reason = data.get('reason')
-        location = data.get('location')
-        contact_info = data.get('contact_info')
         input_pdf_file = data.get('input_pdf_file')
+        if data.get('input_pdf_base64'):
+            ## raw PDF bytes skip the download entirely; input_pdf_file may also be a local path
+            input_pdf_file = base64.b64decode(data.get('input_pdf_base64'))
+        if str(data.get('async', False)).lower() == "true":
+            return submit_pdf_sign_job(data, input_pdf_file)
         output_signed_pdf_file = data.get('output_signed_pdf_file')
-        object_pdf_signer = LeafletPDFDigitalSigner(
-            pfx_path=pfx_path,
-            pfx_password=pfx_password.encode('utf-8'),            
-            field_name=field_name,
-            signer_name=signer_name,
-            reason=reason,
-            location=location,
-            contact_info=contact_info
-        )
+        object_pdf_signer = new_pdf_signer(data)
         resp_status = object_pdf_signer.sign_process(input_pdf_file)
         logger.debug(f"status: PDF file sign completed")
         return resp_status ###jsonify({"out_file": resp_status})
     except Exception as e:
         logger.error('Exception PDF file sign:', exc_info=e)
         return jsonify({"error": str(e)})
+
+@app.route('/api/pdf/sign/batch', methods=['POST'])
+def pdf_file_sign_batch():
+    """
+    Sign a list of PDFs with one signer config. The certificate is loaded
+    once and the files are signed concurrently (PDF_SIGN_BATCH_WORKERS).
+    Streams NDJSON, one result per file as it completes: index, status,
+    hashvalue, out_path and blob_64encode (omitted with responseType "path").
+    """
+    try:
+        data = request.get_json()
+        inputs = [pdf_sign_input(item) for item in (data.get('inputs') or [])]
+        if not inputs:
+            return jsonify({'status': 'error', 'message': 'inputs list is required'}), 400
+        if len(inputs) > PDF_SIGN_BATCH_MAX_ITEMS:
+            return jsonify({'status': 'error', 'message': f'At most {PDF_SIGN_BATCH_MAX_ITEMS} files per request'}), 400
+        include_blob = str(data.get('responseType', 'blob')).lower() != "path"
+        object_pdf_signer = new_pdf_signer(data)
+        logger.debug(f"pdf_file_sign_batch: {len(inputs)} files")
+
+        def generate():
+            for result in object_pdf_signer.sign_batch(inputs, max_workers=PDF_SIGN_BATCH_WORKERS,
+                                                       include_blob=include_blob):
+                yield json.dumps(result) + "\n"
+        return Response(generate(), mimetype='application/x-ndjson')
+    except Exception as e:
+        logger.error('Exception pdf_file_sign_batch:', exc_info=e)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/pdf/sign/jobs', methods=['POST'])
+def pdf_sign_job_create():
+    """Same body as /api/pdf/appysign; returns 202 with a job id, or 429 when the queue is full."""
+    try:
+        data = request.get_json()
+        input_pdf_file = pdf_sign_input(data)
+        if not input_pdf_file:
+            return jsonify({'status': 'error', 'message': 'input_pdf_file or input_pdf_base64 is required'}), 400
+        return submit_pdf_sign_job(data, input_pdf_file)
+    except Exception as e:
+        logger.error('Exception pdf_sign_job_create:', exc_info=e)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/pdf/sign/jobs/<job_id>', methods=['GET'])
+def pdf_sign_job_status(job_id):
+    """queued | running | completed (with result) | failed (with error)."""
+    job = PDF_SIGN_JOBS.status(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f'Unknown job {job_id}'}), 404
+    return jsonify(job)
+
+@app.route('/api/pdf/sign/jobs/<job_id>/file', methods=['GET'])
+def pdf_sign_job_file(job_id):
+    """Signed PDF of a completed job."""
+    job = PDF_SIGN_JOBS.status(job_id)
+    out_path = ((job or {}).get('result') or {}).get('out_path')
+    if not out_path or not os.path.exists(out_path):
+        return jsonify({'status': 'error', 'message': f'No signed file for job {job_id}'}), 404
+    return send_file(out_path, mimetype='application/pdf', as_attachment=True,
+                     download_name=os.path.basename(out_path))
+
+@app.route('/api/pdf/tsa/status', methods=['GET'])
+def pdf_tsa_status():
+    """Per-TSA latency, error counts and circuit state for every timestamper in use."""
+    return jsonify(LeafletSignerPool.stats())
+
+@app.route('/api/pdf/signer-pool/invalidate', methods=['POST'])
+def pdf_signer_pool_invalidate():
+    """Drop cached signers for pfx_path (e.g. after a certificate renewal), or everything."""
+    try:
+        data = request.get_json(silent=True) or {}
+        pfx_path = data.get('pfx_path')
+        dropped = LeafletSignerPool.invalidate(pfx_path)
+        logger.info(f"Signer pool invalidated: {pfx_path or 'all'} => {dropped} entries")
+        return jsonify({"status": "success", "invalidated": dropped, "pool": LeafletSignerPool.stats()})
+    except Exception as e:
+        logger.error('Exception pdf_signer_pool_invalidate:', exc_info=e)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
           
 ################### PDF file Signed ######################
 from pdf_file_metadata import LeafletPDFSignAnalyzer
+from pdf_analysis_cache import LeafletPDFAnalysisCache
+## @ analyses cached by file SHA-256, stored zlib-compressed
+PDF_ANALYSIS_CACHE_ITEMS = int(os.environ.get("PDF_ANALYSIS_CACHE_ITEMS", "1024"))
+PDF_ANALYSIS_CACHE_MB = int(os.environ.get("PDF_ANALYSIS_CACHE_MB", "32"))
+PDF_ANALYSIS_CACHE = LeafletPDFAnalysisCache.configure_shared(max_items=PDF_ANALYSIS_CACHE_ITEMS,
+                                                              max_bytes=PDF_ANALYSIS_CACHE_MB * 1024 * 1024,
+                                                              logger=logger)
 @app.route('/api/pdf/sign-metadata', methods=['POST'])
 def pdf_file_sign_metadata():
+    """
+    Signature fields of file_path with each signature's ByteRange digest and
+    CMS signature verified (integrity, all_signatures_intact,
+    incremental_updates_after_signing). verify false lists the fields only.
+    analysis "full" adds metadata, page count and revisions.
+    """
     try:
         data = request.get_json()
         file_path = data.get('file_path')
         obj_pdf = LeafletPDFSignAnalyzer(log_prefix="sign_metadata")
-        signatures_json = obj_pdf.check_digital_signatures(file_path)
+        if str(data.get('analysis', '')).lower() == "full":
+            ## metadata, signatures, page count, revisions and ByteRange/CMS integrity, cached by SHA-256
+            return jsonify(obj_pdf.analyze(file_path))
+        ## signature fields from the trailer scan, verified unless verify is false
+        verify = str(data.get('verify', True)).lower() != "false"
+        signatures_json = obj_pdf.check_digital_signatures(file_path, verify=verify)
         logger.debug(f"status: {signatures_json} => pdf_file_sign_metadata completed")
         return signatures_json
     except Exception as e:
         logger.error('Exception pdf_file_sign_metadata:', exc_info=e)
         return jsonify({"error": str(e)})
+
+@app.route('/api/pdf/sign-metadata/cache', methods=['GET'])
+def pdf_file_sign_metadata_cache():
+    """Entries, compressed size and hit/miss counts of the analysis cache."""
+    return jsonify(PDF_ANALYSIS_CACHE.stats())
         
 ################### Sales Force ######################
 PYTHON_ENV_EXE = r"F:\IISsites\notary_vir_env\Scripts\python.exe"  # Path to virtual env's python.exe
@@ -1,10 +1,20 @@
 import cairo
 import math
+import io
 import os
 import sys
 import random
 import json
 import logging
+import threading
+from seal_glyph_metrics import LeafletGlyphMetrics
+
+## Cairo vector surfaces for sealFormat svg|pdf; png uses an ImageSurface
+VECTOR_SURFACES = {"svg": cairo.SVGSurface, "pdf": cairo.PDFSurface}
+
+## Static seal layers keyed by (style, width, height)
+_STATIC_LAYERS = {}
+_STATIC_LAYERS_LOCK = threading.Lock()
 
 class LeafletNotarySeal:
     def __init__(self):
@@ -31,41 +41,13 @@ class LeafletNotarySeal:
         ctx.select_font_face(font_family, cairo.FONT_SLANT_NORMAL, font_weight)
         ctx.set_source_rgb(0, 0, 0) # Black color for text
 
-        # Calculate total text width on the baseline
-        total_text_width = 0
-        for char in text:
-            extents = ctx.text_extents(char)
-            total_text_width += extents.x_advance
-        
-        # Calculate the total angle span for the text
-        total_angular_span = total_text_width / radius
+        vector = not isinstance(ctx.get_target(), cairo.ImageSurface)
+        layout = self.layout_curved_text(text, radius, start_angle_deg, clockwise, font_size, font_family, font_weight, vector)
         
-        # Convert start_angle_deg to radians
-        start_angle_rad = math.radians(start_angle_deg)
-        
-        ctx.save()
-        ctx.translate(center_x, center_y)
-
-        # Initial rotation to position the starting point of the text arc
-        # This centers the entire text block around start_angle_rad
-        if clockwise:
-            ctx.rotate(start_angle_rad - total_angular_span / 2)
-        else: # Anti-clockwise
-            ctx.rotate(start_angle_rad + total_angular_span / 2)
-
-        for char in text:
-            extents = ctx.text_extents(char)
-            char_width = extents.x_advance
-            
-            # Calculate angle for this character based on its width
-            char_angle_increment = char_width / radius
-            
-            if clockwise:
-                ctx.rotate(char_angle_increment / 2) # Rotate to the center of the character
-            else: # Anti-clockwise
-                ctx.rotate(-char_angle_increment / 2) # Rotate to the center of the character (negatively)
-
+        for char, char_angle, char_width in layout:
             ctx.save()
+            ctx.translate(center_x, center_y)
+            ctx.rotate(char_angle) # Rotate to the center of the character
             # Move to the position on the radius for the character's baseline
             ctx.translate(radius, 0)
             
@@ -76,42 +58,110 @@ class LeafletNotarySeal:
                 ctx.rotate(-math.pi / 2) # Characters point towards center
 
             # Move back by half the character's width to center it visually
-            ctx.move_to(-extents.width / 2, 0)
+            ctx.move_to(-char_width / 2, 0)
 
             ctx.show_text(char)
             ctx.restore() # Restore after showing char
-            
-            if clockwise:
-                ctx.rotate(char_angle_increment / 2) # Rotate past the character to the next start point
-            else: # Anti-clockwise
-                ctx.rotate(-char_angle_increment / 2) # Rotate past the character to the next start point
-                
-        ctx.restore()
-
-    def generate_notary_seal(self, upper_circle_text, lower_circle_text, notaryId, expireOn,  output_filename):
+
+    def layout_curved_text(self, text, radius, start_angle_deg, clockwise=True, font_size=12, font_family="Times New Roman", font_weight=cairo.FONT_WEIGHT_NORMAL, vector=False):
+        """
+        Computes the arc position of every character in one pass over cached glyph metrics.
+        vector=True uses unhinted metrics, as drawn on SVG/PDF surfaces.
+
+        :return: list of (char, angle_rad, ink_width); angle_rad is the absolute rotation
+                 of the character centre about the circle centre.
+        """
+        metrics = [LeafletGlyphMetrics.text_extents(font_family, font_weight, font_size, char, vector=vector) for char in text]
+
+        # Calculate the total angle span for the text on the baseline
+        total_angular_span = sum(extents.x_advance for extents in metrics) / radius
+        direction = 1 if clockwise else -1
+
+        # Centre the entire text block around start_angle_deg
+        angle = math.radians(start_angle_deg) - direction * total_angular_span / 2
+
+        layout = []
+        for char, extents in zip(text, metrics):
+            # Angle for this character based on its width
+            char_angle_increment = extents.x_advance / radius
+            layout.append((char, angle + direction * char_angle_increment / 2, extents.width))
+            angle += direction * char_angle_increment
+        return layout
+
+    ## Seal geometry shared by the static and dynamic layers
+    WIDTH, HEIGHT = 500, 500 # Image dimensions
+    OUTERMOST_CIRCLE_RADIUS = 140
+    INNERMOST_CIRCLE_RADIUS = 70
+
+    def draw_static_layer(self, ctx):
+        """Draw the parts shared by every seal: both circles and the "NOTARY"/"PUBLIC" arcs."""
+        center_x, center_y = self.WIDTH / 2, self.HEIGHT / 2
+        inner_text_radius_baseline = self.INNERMOST_CIRCLE_RADIUS -25 
+        ctx.set_line_width(3)     
+        ctx.set_source_rgb(0, 0, 0) # Black color for lines
+        # Outermost circle
+        ctx.arc(center_x, center_y, self.OUTERMOST_CIRCLE_RADIUS, 0, 2 * math.pi)
+        ctx.stroke()
+        # Innermost circle
+        ctx.arc(center_x, center_y, self.INNERMOST_CIRCLE_RADIUS, 0, 2 * math.pi)
+        ctx.stroke()
+
+        self.draw_curved_text(ctx, "NOTARY", center_x, center_y, 
+                        inner_text_radius_baseline, 270, True, 16, # Reduced font size to fit
+                        "Times New Roman", cairo.FONT_WEIGHT_BOLD, "outward")
+
+        # "PUBLIC" (anti-clockwise, bottom half, centered at 270 degrees, bold)
+        self.draw_curved_text(ctx, "PUBLIC", center_x, center_y, 
+                        inner_text_radius_baseline+10, 90, False, 16, # Reduced font size to fit
+                        "Times New Roman", cairo.FONT_WEIGHT_BOLD, "inward")
+
+    def get_static_layer(self):
+        """Static layer rendered once per process into a transparent surface."""
+        key = ("circle", self.WIDTH, self.HEIGHT)
+        static_surface = _STATIC_LAYERS.get(key)
+        if static_surface is None:
+            with _STATIC_LAYERS_LOCK:
+                static_surface = _STATIC_LAYERS.get(key)
+                if static_surface is None:
+                    static_surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, self.WIDTH, self.HEIGHT)
+                    ctx = cairo.Context(static_surface)
+                    ctx.set_antialias(cairo.ANTIALIAS_BEST)
+                    self.draw_static_layer(ctx)
+                    static_surface.flush()
+                    _STATIC_LAYERS[key] = static_surface
+        return static_surface
+
+    def generate_notary_seal(self, upper_circle_text, lower_circle_text, notaryId, expireOn,  output_filename=None, layered=True, seal_format="png"):
         """
         Generates an e-notary seal image based on the latest feedback:
         - Reduced gap between outer and inner circles.
         - "NOTARY" and "PUBLIC" placed inside the innermost circle.
         - Increased border density (line width).
+
+        Writes the PNG to output_filename, or returns the PNG bytes when no
+        file name is given. With layered=True the circles and fixed arcs are
+        painted from the cached static layer and only the notary text is drawn.
+        seal_format "svg" or "pdf" draws everything as vectors (never layered).
         """
-        WIDTH, HEIGHT = 500, 500 # Image dimensions
-        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, WIDTH, HEIGHT)
+        WIDTH, HEIGHT = self.WIDTH, self.HEIGHT
+        if seal_format == "png":
+            surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, WIDTH, HEIGHT)
+        elif seal_format in VECTOR_SURFACES:
+            target = output_filename or io.BytesIO()
+            surface = VECTOR_SURFACES[seal_format](target, WIDTH, HEIGHT)
+            layered = False
+        else:
+            raise ValueError(f"Unsupported seal format: {seal_format}")
         ctx = cairo.Context(surface)
         ctx.set_antialias(cairo.ANTIALIAS_BEST)
-        ctx.set_line_width(3)     
         center_x, center_y = WIDTH / 2, HEIGHT / 2
-        outermost_circle_radius = 140
-        innermost_circle_radius = 70 
-        outer_text_radius_baseline = (outermost_circle_radius + innermost_circle_radius) / 2 
-        inner_text_radius_baseline = innermost_circle_radius -25 
-        ctx.set_source_rgb(0, 0, 0) # Black color for lines
-        # Outermost circle
-        ctx.arc(center_x, center_y, outermost_circle_radius, 0, 2 * math.pi)
-        ctx.stroke()
-        # Innermost circle
-        ctx.arc(center_x, center_y, innermost_circle_radius, 0, 2 * math.pi)
-        ctx.stroke()
+        outer_text_radius_baseline = (self.OUTERMOST_CIRCLE_RADIUS + self.INNERMOST_CIRCLE_RADIUS) / 2 
+
+        if layered:
+            ctx.set_source_surface(self.get_static_layer(), 0, 0)
+            ctx.paint()
+        else:
+            self.draw_static_layer(ctx)
         
         self.draw_curved_text(ctx, upper_circle_text, center_x, center_y, 
                         outer_text_radius_baseline-10, 270, True, 22, 
@@ -122,15 +172,6 @@ class LeafletNotarySeal:
                         outer_text_radius_baseline+10, 90, False, 22, 
                         "Times New Roman", cairo.FONT_WEIGHT_NORMAL, "inward")
 
-        self.draw_curved_text(ctx, "NOTARY", center_x, center_y, 
-                        inner_text_radius_baseline, 270, True, 16, # Reduced font size to fit
-                        "Times New Roman", cairo.FONT_WEIGHT_BOLD, "outward")
-
-        # "PUBLIC" (anti-clockwise, bottom half, centered at 270 degrees, bold)
-        self.draw_curved_text(ctx, "PUBLIC", center_x, center_y, 
-                        inner_text_radius_baseline+10, 90, False, 16, # Reduced font size to fit
-                        "Times New Roman", cairo.FONT_WEIGHT_BOLD, "inward")
-
         # --- Draw Horizontal Text in the Center ---
         ctx.select_font_face("Times New Roman", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
         ctx.set_font_size(14) # Smaller font for horizontal text
@@ -150,7 +191,21 @@ class LeafletNotarySeal:
 
         ctx.move_to(center_x - extents2.width / 2, first_line_baseline_y + extents1.height + line_spacing)
         ctx.show_text(text2)
-        surface.write_to_png(output_filename)
+        if seal_format != "png":
+            surface.finish()
+            return output_filename if output_filename else target.getvalue()
+
+        if output_filename:
+            surface.write_to_png(output_filename)
+            return output_filename
+
+        buffer = io.BytesIO()
+        surface.write_to_png(buffer)
+        return buffer.getvalue()
+
+    def render_seal_bytes(self, upper_circle_text, lower_circle_text, notaryId, expireOn, seal_format="png"):
+        """Render the seal in memory as png, svg or pdf bytes."""
+        return self.generate_notary_seal(upper_circle_text, lower_circle_text, notaryId, expireOn, seal_format=seal_format)
     
     def load_json_data(self, json_data):
         try:
@@ -1,17 +1,35 @@
 import cairo
 import math
+import io
 import os
 import sys
 import random
 import json
 import logging
+import threading
+from seal_glyph_metrics import LeafletGlyphMetrics
+
+## Cairo vector surfaces for sealFormat svg|pdf; png uses an ImageSurface
+VECTOR_SURFACES = {"svg": cairo.SVGSurface, "pdf": cairo.PDFSurface}
+
+## Static stamp layers keyed by (width, height, text color, border color, label size)
+_STATIC_LAYERS = {}
+_STATIC_LAYERS_LOCK = threading.Lock()
 
 class LeafletNotaryStampGeneratorCairo:
-    def __init__(self, width=600, height=250):
+    def __init__(self, width=600, height=250, seal_format="png"):
         self.width = width
         self.height = height
-        # Create Cairo surface and context
-        self.surface = cairo.ImageSurface(cairo.FORMAT_RGB24, width, height)
+        self.seal_format = seal_format
+        # Create Cairo surface and context; svg/pdf are drawn into a vector surface
+        if seal_format == "png":
+            self.buffer = None
+            self.surface = cairo.ImageSurface(cairo.FORMAT_RGB24, width, height)
+        elif seal_format in VECTOR_SURFACES:
+            self.buffer = io.BytesIO()
+            self.surface = VECTOR_SURFACES[seal_format](self.buffer, width, height)
+        else:
+            raise ValueError(f"Unsupported seal format: {seal_format}")
         self.ctx = cairo.Context(self.surface)
         
         # Set white background
@@ -68,7 +86,6 @@ class LeafletNotaryStampGeneratorCairo:
                          font_size=16, color=(0, 0, 0), upside_down=False, char_spacing=1.5):
         """Draw text along a circular arc with proper spacing to prevent overlap"""
         char_spacing = 1.5  # Default spacing
-        print(f"char_spacing: {char_spacing}")
         self.ctx.set_source_rgb(*color)
         self.ctx.select_font_face("Arial", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_BOLD)
         self.ctx.set_font_size(font_size)
@@ -142,8 +159,9 @@ class LeafletNotaryStampGeneratorCairo:
             else:
                 self.ctx.rotate(angle - math.pi/2)  # Top text rotation
             
-            # Get text extents for centering
-            text_extents = self.ctx.text_extents(char)
+            # Get text extents for centering (memoized per font and char)
+            text_extents = LeafletGlyphMetrics.text_extents("Arial", cairo.FONT_WEIGHT_BOLD, font_size, char,
+                                                            vector=self.seal_format != "png")
             
             # Draw character centered
             self.ctx.move_to(-text_extents.width/2, text_extents.height/2)
@@ -161,25 +179,17 @@ class LeafletNotaryStampGeneratorCairo:
         self.ctx.move_to(x, y)
         self.ctx.show_text(text)
     
-    def create_notary_stamp(self, 
-                           top_curved_text="Notary Public",
-                           bottom_curved_text="State of Texas",
-                           name="Mercedes Smith",
-                           notary_id="1234567",
-                           expiry_date="05/01/20XX",
-                           text_color=(0, 0, 0),
-                           border_color=(0, 0, 0),
-                           font_size_curved=16,
-                           font_size_horizontal=14):
-        """Create the complete notary stamp"""
-        
+    def _seal_geometry(self):
+        """Centre and radius of the circular seal area"""
+        return 120, self.height // 2, 80
+
+    def draw_static_layer(self, text_color=(0, 0, 0), border_color=(0, 0, 0), font_size_horizontal=14):
+        """Draw the parts shared by every stamp: border, frame, circles, star and labels"""
         # Draw outer border
         self.draw_rounded_border(border_color=border_color)
         
         # Circle parameters
-        circle_center_x = 120
-        circle_center_y = self.height // 2
-        circle_radius = 80
+        circle_center_x, circle_center_y, circle_radius = self._seal_geometry()
         
         # Draw simple rectangular border around the circular seal area
         rect_margin = 15
@@ -210,6 +220,55 @@ class LeafletNotaryStampGeneratorCairo:
         self.draw_star(circle_center_x, circle_center_y, outer_radius=20, inner_radius=8, 
                       color=border_color, width=2)
         
+        # Static labels on the right side
+        right_text_x = circle_center_x + circle_radius + 40
+        self.draw_horizontal_text("Notary ID #", right_text_x, circle_center_y - 10, 
+                                 font_size=font_size_horizontal, color=text_color)
+        self.draw_horizontal_text("My Commission Expires", right_text_x, circle_center_y + 30, 
+                                 font_size=font_size_horizontal, color=text_color)
+
+    def paint_static_layer(self, text_color=(0, 0, 0), border_color=(0, 0, 0), font_size_horizontal=14):
+        """Paint the cached static layer for this size and style onto the stamp"""
+        key = (self.width, self.height, tuple(text_color), tuple(border_color), font_size_horizontal)
+        static_surface = _STATIC_LAYERS.get(key)
+        if static_surface is None:
+            with _STATIC_LAYERS_LOCK:
+                static_surface = _STATIC_LAYERS.get(key)
+                if static_surface is None:
+                    layer = LeafletNotaryStampGeneratorCairo(width=self.width, height=self.height)
+                    layer.draw_static_layer(text_color, border_color, font_size_horizontal)
+                    layer.surface.flush()
+                    static_surface = layer.surface
+                    _STATIC_LAYERS[key] = static_surface
+        self.ctx.save()
+        self.ctx.set_source_surface(static_surface, 0, 0)
+        self.ctx.paint()
+        self.ctx.restore()
+
+    def create_notary_stamp(self, 
+                           top_curved_text="Notary Public",
+                           bottom_curved_text="State of Texas",
+                           name="Mercedes Smith",
+                           notary_id="1234567",
+                           expiry_date="05/01/20XX",
+                           text_color=(0, 0, 0),
+                           border_color=(0, 0, 0),
+                           font_size_curved=16,
+                           font_size_horizontal=14,
+                           layered=True):
+        """
+        Create the complete notary stamp.
+        With layered=True the static layer comes from a per-style cached surface
+        and only the notary-specific text is drawn here. Vector formats always
+        draw the static layer so it stays vector.
+        """
+        if layered and self.seal_format == "png":
+            self.paint_static_layer(text_color, border_color, font_size_horizontal)
+        else:
+            self.draw_static_layer(text_color, border_color, font_size_horizontal)
+
+        circle_center_x, circle_center_y, circle_radius = self._seal_geometry()
+        
         # Draw curved text with fixed positioning to prevent overlap
         # Top curved text - positioned in upper semicircle only
         self.draw_text_on_arc(
@@ -251,20 +310,40 @@ class LeafletNotaryStampGeneratorCairo:
         self.ctx.stroke()
         
         # Notary ID
-        self.draw_horizontal_text("Notary ID #", right_text_x, circle_center_y - 10, 
-                                 font_size=font_size_horizontal, color=text_color)
         self.draw_horizontal_text(notary_id, right_text_x, circle_center_y + 10, 
                                  font_size=font_size_horizontal + 2, color=text_color, bold=True)
         
         # Commission expiry
-        self.draw_horizontal_text("My Commission Expires", right_text_x, circle_center_y + 30, 
-                                 font_size=font_size_horizontal, color=text_color)
         self.draw_horizontal_text(expiry_date, right_text_x, circle_center_y + 50, 
                                  font_size=font_size_horizontal + 2, color=text_color, bold=True)
     
     def save_stamp(self, filename="notary_stamp_cairo.png"):
         """Save the generated stamp"""
         self.surface.write_to_png(filename)       
+
+    def get_png_bytes(self):
+        """Return the generated stamp as PNG bytes without touching disk"""
+        buffer = io.BytesIO()
+        self.surface.write_to_png(buffer)
+        return buffer.getvalue()
+
+    def get_seal_bytes(self):
+        """Return the stamp in self.seal_format; a vector surface is finished here"""
+        if self.seal_format == "png":
+            return self.get_png_bytes()
+        self.surface.finish()
+        return self.buffer.getvalue()
+
+    def render_seal_bytes(self, top_curved_text, bottom_curved_text, name, notary_id, expiry_date):
+        """Create the stamp with the standard seal styling in self.seal_format"""
+        self.create_notary_stamp(
+            top_curved_text=top_curved_text,
+            bottom_curved_text=bottom_curved_text,
+            name=name,
+            notary_id=notary_id,
+            expiry_date=expiry_date
+        )
+        return self.get_seal_bytes()
     
     ######## Helper functions for Class interaction #######
     def load_json_data(self, json_data):
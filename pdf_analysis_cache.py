@@ -0,0 +1,93 @@
+#######################
+## Leaflet technology
+## Content-addressed cache of PDF signature/metadata analyses
+########################
+from collections import OrderedDict
+import threading
+import json
+import zlib
+
+
+class LeafletPDFAnalysisCache:
+    """
+    Bounded LRU of analysis results.
+
+    Full analyses are keyed by the SHA-256 of the PDF, which the shared
+    digest engine caches by (path, size, mtime). The single parts served
+    by /api/pdf/sign-metadata without analysis "full" are keyed by
+    (path, size, mtime) and part directly, with no content hash. Results
+    are stored as zlib-compressed compact JSON, bounded by entry count and
+    total compressed bytes.
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_items=1024, max_bytes=32 * 1024 * 1024, logger=None):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.logger = logger
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    @classmethod
+    def configure_shared(cls, max_items=1024, max_bytes=32 * 1024 * 1024, logger=None):
+        with cls._shared_lock:
+            cls._shared = cls(max_items=max_items, max_bytes=max_bytes, logger=logger)
+        return cls._shared
+
+    def logs(self, msg):
+        if(self.logger):
+            self.logger.debug(msg)
+
+    def get(self, key):
+        with self._lock:
+            blob = self._items.get(key)
+            if blob is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+        return json.loads(zlib.decompress(blob))
+
+    def put(self, key, result):
+        blob = zlib.compress(json.dumps(result, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._items[key] = blob
+            self._bytes += len(blob)
+            while self._items and (len(self._items) > self.max_items or self._bytes > self.max_bytes):
+                old_key, old_blob = self._items.popitem(last=False)
+                self._bytes -= len(old_blob)
+        self.logs(f"[ANALYSIS-CACHE]: stored {key[-64:]} ({len(blob)} bytes)")
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._items.clear()
+                self._bytes = 0
+            else:
+                blob = self._items.pop(key, None)
+                if blob is not None:
+                    self._bytes -= len(blob)
+
+    def stats(self):
+        return {
+            "items": len(self._items),
+            "bytes": self._bytes,
+            "max_items": self.max_items,
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -1,12 +1,41 @@
 
 
-import fitz
 import datetime
 import os
+import mmap
 import logging
 import json
+import threading
 from typing import Dict, List, Optional, Any
 from pypdf import PdfReader
+from pdf_trailer_scan import LeafletPDFTrailerScanner
+from pdf_signature_verify import verify_byte_range
+from pdf_analysis_cache import LeafletPDFAnalysisCache
+from file_hashing import LeafletFileDigestEngine
+
+## one logger per log prefix, shared by every analyzer instance
+_LOGGER_LOCK = threading.Lock()
+
+## Document info keys -> metadata keys (as PyMuPDF names them)
+PDF_METADATA_KEYS = {
+    "/Title": "title",
+    "/Author": "author",
+    "/Subject": "subject",
+    "/Keywords": "keywords",
+    "/Creator": "creator",
+    "/Producer": "producer",
+    "/CreationDate": "creationDate",
+    "/ModDate": "modDate",
+    "/Trapped": "trapped"
+}
+## Signature dictionary text entries reported per signature
+SIGNATURE_TEXT_KEYS = {
+    "name": "/Name",
+    "location": "/Location",
+    "reason": "/Reason",
+    "contact_info": "/ContactInfo",
+    "signing_date": "/M"
+}
 
 
 class LeafletPDFSignAnalyzer:
@@ -14,17 +43,17 @@ class LeafletPDFSignAnalyzer:
     A class for analyzing PDF digital signatures with JSON output and comprehensive logging.
     """
     
-    def __init__(self, log_prefix: str = "pdf_analysis"):
+    def __init__(self, log_prefix: str = "pdf_analysis", cache: Optional[LeafletPDFAnalysisCache] = None):
         """
         Initialize the PDF Analyzer with logging configuration.
         
         Args:
             log_prefix (str): Prefix for log filenames (default: "pdf_analysis")
+            cache (LeafletPDFAnalysisCache): Analysis result cache (default: the shared one)
         """
         self.log_prefix = log_prefix
         self.logger = self._setup_logger()
-        
-        self.logger.info("LeafletPDFSignAnalyzer initialized successfully")
+        self.cache = cache if cache is not None else LeafletPDFAnalysisCache.shared()
     
     def _setup_logger(self):
         """Setup logger with date-based file logging in sign_logs folder."""
@@ -41,37 +70,12 @@ class LeafletPDFSignAnalyzer:
             log_filename = f"{current_date.strftime('%d%b%y')}_{self.log_prefix}.log"
             log_filepath = os.path.join(log_dir, log_filename)
             
-            # Create logger
-            logger = logging.getLogger(f"{__name__}_{self.log_prefix}_{id(self)}")
-            logger.setLevel(logging.INFO)
-            
-            # Remove existing handlers to avoid duplicates
-            for handler in logger.handlers[:]:
-                logger.removeHandler(handler)
-            
-            # Create file handler
-            file_handler = logging.FileHandler(log_filepath, mode='a', encoding='utf-8')
-            file_handler.setLevel(logging.INFO)
-            
-            # Create console handler
-            console_handler = logging.StreamHandler()
-            console_handler.setLevel(logging.INFO)
-            
-            # Create formatter
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-                datefmt='%Y-%m-%d %H:%M:%S'
-            )
-            
-            file_handler.setFormatter(formatter)
-            console_handler.setFormatter(formatter)
-            
-            # Add handlers to logger
-            logger.addHandler(file_handler)
-            logger.addHandler(console_handler)
-            
-            logger.info(f"Logger initialized. Log file: {log_filepath}")
-            return logger
+            # Reuse the prefix's logger while it still writes to today's file
+            logger = logging.getLogger(f"{__name__}_{self.log_prefix}")
+            with _LOGGER_LOCK:
+                if any(getattr(handler, "baseFilename", None) == os.path.abspath(log_filepath) for handler in logger.handlers):
+                    return logger
+                return self._attach_handlers(logger, log_filepath)
             
         except Exception as e:
             # Fallback to basic logger if file logging fails
@@ -79,6 +83,39 @@ class LeafletPDFSignAnalyzer:
             fallback_logger.error(f"Failed to setup file logging: {str(e)}")
             return fallback_logger
     
+    def _attach_handlers(self, logger, log_filepath):
+        """Replace the logger's handlers with a file handler for log_filepath and a console handler."""
+        logger.setLevel(logging.INFO)
+        
+        # Remove existing handlers to avoid duplicates
+        for handler in logger.handlers[:]:
+            logger.removeHandler(handler)
+            handler.close()
+        
+        # Create file handler
+        file_handler = logging.FileHandler(log_filepath, mode='a', encoding='utf-8')
+        file_handler.setLevel(logging.INFO)
+        
+        # Create console handler
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.INFO)
+        
+        # Create formatter
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+        
+        file_handler.setFormatter(formatter)
+        console_handler.setFormatter(formatter)
+        
+        # Add handlers to logger
+        logger.addHandler(file_handler)
+        logger.addHandler(console_handler)
+        
+        logger.info(f"Logger initialized. Log file: {log_filepath}")
+        return logger
+    
     def _validate_file_path(self, file_path: str) -> bool:
         """
         Validate if the file path exists and is a PDF file.
@@ -115,219 +152,351 @@ class LeafletPDFSignAnalyzer:
             self.logger.error(f"Error validating file path {file_path}: {str(e)}")
             return False
     
-    def extract_metadata(self, file_path: str) -> Optional[str]:
+    def _open_pdf(self, file_path: str):
         """
-        Extract metadata from a PDF file using PyMuPDF (fitz).
-        
-        Args:
-            file_path (str): Path to the PDF file
-            
-        Returns:
-            Optional[str]: JSON string containing metadata or None if failed
+        Map the file read-only and open it once.
+        The trailer-first scanner is tried first: it reads the xref sections
+        from the end of the file and resolves only the catalog, info,
+        AcroForm and signature objects. A full pypdf parse over the same map
+        is the fallback when the scanner cannot handle the file.
+        Returns (file, mapped, reader, parser); close with _close_pdf.
         """
+        pdf_file = open(file_path, 'rb')
         try:
-            self.logger.info(f"Starting metadata extraction for: {file_path}")
-            
-            # Validate file path
-            if not self._validate_file_path(file_path):
-                return json.dumps({
-                    "status": "error",
-                    "message": "File validation failed",
-                    "file_path": file_path,
-                    "metadata": {}
-                }, indent=2)
-            
-            # Open PDF document
-            doc = fitz.open(file_path)
-            metadata = doc.metadata
-            
-            if not metadata:
-                self.logger.warning(f"No metadata found in PDF: {file_path}")
-                doc.close()
-                return json.dumps({
-                    "status": "success",
-                    "message": "No metadata found in PDF",
-                    "file_path": file_path,
-                    "analysis_timestamp": datetime.datetime.now().isoformat(),
-                    "metadata": {}
-                }, indent=2)
-            
-            # Convert metadata to serializable format
-            serializable_metadata = {}
-            for key, value in metadata.items():
-                if value is not None:
-                    serializable_metadata[key] = str(value)
-            
-            self.logger.info(f"Successfully extracted metadata from: {file_path}")
-            self.logger.info("=== PDF Metadata ===")
-            
-            for key, value in serializable_metadata.items():
-                self.logger.info(f"{key}: {value}")
-            
-            doc.close()
-            
-            result = {
-                "status": "success",
-                "message": f"Successfully extracted {len(serializable_metadata)} metadata field(s)",
-                "file_path": file_path,
-                "analysis_timestamp": datetime.datetime.now().isoformat(),
-                "metadata": serializable_metadata
-            }
-            
-            return json.dumps(result, indent=2, ensure_ascii=False)
-            
+            mapped = mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            pdf_file.close()
+            raise
+        try:
+            return pdf_file, mapped, LeafletPDFTrailerScanner(mapped).load_signature_objects(), "trailer"
         except Exception as e:
-            self.logger.error(f"Error extracting metadata from {file_path}: {str(e)}")
+            self.logger.info(f"Trailer scan not usable, full parse: {str(e)}")
+        try:
+            return pdf_file, mapped, PdfReader(mapped), "pypdf"
+        except Exception:
+            mapped.close()
+            pdf_file.close()
+            raise
+
+    @staticmethod
+    def _close_pdf(pdf_file, mapped):
+        try:
+            mapped.close()
+        finally:
+            pdf_file.close()
+
+    @staticmethod
+    def _revision_offsets(mapped) -> List[int]:
+        """End offset of every %%EOF marker; one per incremental-update revision."""
+        offsets = []
+        position = mapped.find(b"%%EOF")
+        while position != -1:
+            offsets.append(position + 5)
+            position = mapped.find(b"%%EOF", position + 5)
+        return offsets
+
+    def _metadata_result(self, reader, file_path: str) -> Dict[str, Any]:
+        """Document info mapped to the PyMuPDF metadata keys used by earlier responses."""
+        metadata = {"format": f"PDF {reader.pdf_header[5:]}"}
+        info = reader.metadata or {}
+        for pdf_key, key in PDF_METADATA_KEYS.items():
+            value = info.get(pdf_key)
+            metadata[key] = str(value) if value is not None else ""
+        if reader.is_encrypted:
+            metadata["encryption"] = str(reader.trailer["/Encrypt"].get_object().get("/Filter", "")).lstrip("/")
+
+        for key, value in metadata.items():
+            self.logger.info(f"{key}: {value}")
+        return {
+            "status": "success",
+            "message": f"Successfully extracted {len(metadata)} metadata field(s)",
+            "file_path": file_path,
+            "analysis_timestamp": datetime.datetime.now().isoformat(),
+            "metadata": metadata
+        }
+
+    def _signature_info(self, index: int, field_obj) -> Dict[str, Any]:
+        signature_info = {
+            "field_index": index,
+            "field_name": str(field_obj.get("/T", "Unknown")) if field_obj.get("/T") else None,
+            "field_type": str(field_obj.get("/FT")),
+            "name": None,
+            "location": None,
+            "reason": None,
+            "contact_info": None,
+            "signing_date": None,
+            "byte_range": None,
+            "signature_present": False,
+            "error": None
+        }
+
+        sig_dict = field_obj.get("/V")
+        if not sig_dict:
+            self.logger.warning("Signature field found but no signature value present")
+            signature_info["error"] = "No signature value present"
+            return signature_info
+        try:
+            sig_obj = sig_dict.get_object()
+            for key, pdf_key in SIGNATURE_TEXT_KEYS.items():
+                signature_info[key] = str(sig_obj.get(pdf_key)) if sig_obj.get(pdf_key) else None
+            signature_info["byte_range"] = [int(n) for n in sig_obj.get("/ByteRange")] if sig_obj.get("/ByteRange") else None
+            signature_info["signature_present"] = True
+            self.logger.info(f"Digital signature found: {signature_info.get('name', 'Unknown')}")
+        except Exception as e:
+            self.logger.error(f"Error reading signature object: {str(e)}")
+            signature_info["error"] = f"Could not read signature object: {str(e)}"
+        return signature_info
+
+    def _signatures_result(self, reader, file_path: str) -> Dict[str, Any]:
+        result = {
+            "status": "success",
+            "message": None,
+            "file_path": file_path,
+            "analysis_timestamp": datetime.datetime.now().isoformat(),
+            "total_signatures": 0,
+            "signatures": []
+        }
+        if "/Root" not in reader.trailer:
+            self.logger.warning(f"No /Root found in PDF trailer: {file_path}")
+            return dict(result, message="No /Root found in PDF trailer")
+        root = reader.trailer["/Root"]
+        if "/AcroForm" not in root:
+            self.logger.info(f"No AcroForm found in PDF: {file_path}")
+            return dict(result, message="No AcroForm found in PDF")
+        fields = root["/AcroForm"].get("/Fields", [])
+        if not fields:
+            self.logger.info(f"No form fields found in PDF: {file_path}")
+            return dict(result, message="No form fields found in PDF")
+
+        signatures = []
+        for i, field in enumerate(fields):
             try:
-                if 'doc' in locals():
-                    doc.close()
-            except:
-                pass
-            
-            error_result = {
+                field_obj = field.get_object()
+                if field_obj.get("/FT") == "/Sig":
+                    self.logger.info(f"Digital signature field found at index {i}")
+                    signatures.append(self._signature_info(i, field_obj))
+            except Exception as e:
+                self.logger.error(f"Error processing field at index {i}: {str(e)}")
+                continue
+
+        self.logger.info(f"Analysis complete: {len(signatures)} signature(s) found")
+        result.update({
+            "message": f"Found {len(signatures)} digital signature field(s)" if signatures else "No digital signature fields found",
+            "total_signatures": len(signatures),
+            "signatures": signatures
+        })
+        return result
+
+    def _verify_signatures(self, mapped, signatures_result: Dict[str, Any], revision_offsets: List[int]):
+        """
+        Add per-signature ByteRange/CMS integrity, checked over the mapped file,
+        and document-level all_signatures_intact / incremental_updates_after_signing.
+        all_signatures_intact is None when any signature could not be evaluated.
+        """
+        verified = []
+        for signature in signatures_result["signatures"]:
+            if not signature.get("byte_range"):
+                continue
+            integrity = verify_byte_range(mapped, signature["byte_range"], revision_offsets)
+            signature["integrity"] = integrity
+            verified.append(integrity)
+            self.logger.info(f"Signature {signature.get('field_name')}: intact={integrity['intact']} "
+                             f"covers_whole_document={integrity['covers_whole_document']} "
+                             f"unsupported={integrity['unsupported']} error={integrity['error']}")
+        if not verified or any(i["intact"] is None for i in verified) and all(i["intact"] is not False for i in verified):
+            signatures_result["all_signatures_intact"] = None
+        else:
+            signatures_result["all_signatures_intact"] = all(i["intact"] for i in verified)
+        ## bytes after every signed range: LTV/DSS data or later signatures, not by itself tampering
+        signatures_result["incremental_updates_after_signing"] = not any(i["covers_whole_document"] for i in verified) if verified else None
+
+    def analyze(self, file_path: str, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        One-pass analysis as a native dict: the file is opened and parsed once
+        for metadata, signature fields, page count and incremental revisions.
+        metadata_result / signatures_result keep the shapes of extract_metadata
+        and check_digital_signatures.
+
+        Results are cached by the file's SHA-256. The digest engine caches that
+        by (path, size, mtime), so repeat analyses of an unchanged file, or of
+        the same bytes under another path, are served without opening the PDF.
+        """
+        if not use_cache or self.cache is None:
+            return self._analyze(file_path)
+        try:
+            content_sha256 = LeafletFileDigestEngine.shared().digest(file_path, ("sha256",))["sha256"]
+        except Exception:
+            ## unreadable or missing: let _analyze report it
+            return self._analyze(file_path)
+
+        cached = self.cache.get(content_sha256)
+        if cached is not None:
+            self.logger.info(f"PDF analysis served from cache for: {file_path}")
+            for part in (cached, cached.get("metadata_result"), cached.get("signatures_result")):
+                if part:
+                    part["file_path"] = file_path
+            cached["cached"] = True
+            return cached
+
+        analysis_result = self._analyze(file_path)
+        analysis_result["content_sha256"] = content_sha256
+        if analysis_result["status"] == "success":
+            self.cache.put(content_sha256, analysis_result)
+        analysis_result["cached"] = False
+        return analysis_result
+
+    def _analyze(self, file_path: str) -> Dict[str, Any]:
+        """Open and parse file_path; see analyze()."""
+        timestamp = datetime.datetime.now().isoformat()
+        self.logger.info(f"Starting complete PDF analysis for: {file_path}")
+        if not self._validate_file_path(file_path):
+            return {
                 "status": "error",
-                "message": f"Error extracting metadata: {str(e)}",
+                "message": "File validation failed",
                 "file_path": file_path,
-                "analysis_timestamp": datetime.datetime.now().isoformat(),
-                "metadata": {}
+                "analysis_timestamp": timestamp,
+                "metadata_result": {"status": "error", "message": "File validation failed",
+                                    "file_path": file_path, "metadata": {}},
+                "signatures_result": {"status": "error", "message": "File validation failed",
+                                      "file_path": file_path, "signatures": []},
+                "errors": ["File validation failed"]
             }
-            return json.dumps(error_result, indent=2)
-    
-    def check_digital_signatures(self, file_path: str) -> Optional[str]:
+
+        analysis_result = {
+            "status": "success",
+            "message": "PDF analysis completed",
+            "file_path": file_path,
+            "analysis_timestamp": timestamp,
+            "parser": None,
+            "page_count": None,
+            "revisions": None,
+            "revision_offsets": [],
+            "metadata_result": None,
+            "signatures_result": None,
+            "errors": []
+        }
+        try:
+            pdf_file, mapped, reader, analysis_result["parser"] = self._open_pdf(file_path)
+        except Exception as e:
+            error_msg = f"Failed to open PDF: {str(e)}"
+            self.logger.error(error_msg)
+            analysis_result.update({
+                "status": "error",
+                "message": f"Analysis failed: {str(e)}",
+                "metadata_result": {"status": "error", "message": f"Error extracting metadata: {str(e)}",
+                                    "file_path": file_path, "analysis_timestamp": timestamp, "metadata": {}},
+                "signatures_result": {"status": "error", "message": f"Error checking digital signatures: {str(e)}",
+                                      "file_path": file_path, "analysis_timestamp": timestamp, "signatures": []},
+                "errors": [error_msg]
+            })
+            return analysis_result
+
+        try:
+            analysis_result["revision_offsets"] = self._revision_offsets(mapped)
+            analysis_result["revisions"] = len(analysis_result["revision_offsets"])
+            for key, part, builder in (("page_count", "page count", lambda: int(reader.trailer["/Root"]["/Pages"]["/Count"])),
+                                       ("metadata_result", "metadata", lambda: self._metadata_result(reader, file_path)),
+                                       ("signatures_result", "digital signatures", lambda: self._signatures_result(reader, file_path))):
+                try:
+                    analysis_result[key] = builder()
+                except Exception as e:
+                    error_msg = f"Failed to read {part}: {str(e)}"
+                    self.logger.error(error_msg)
+                    analysis_result["errors"].append(error_msg)
+            if analysis_result["signatures_result"]:
+                self._verify_signatures(mapped, analysis_result["signatures_result"], analysis_result["revision_offsets"])
+        finally:
+            self._close_pdf(pdf_file, mapped)
+
+        if analysis_result["errors"]:
+            analysis_result["status"] = "partial_success" if (analysis_result["metadata_result"] or analysis_result["signatures_result"]) else "error"
+            analysis_result["message"] = f"Analysis completed with {len(analysis_result['errors'])} error(s)"
+        self.logger.info(f"PDF analysis completed for: {file_path}")
+        return analysis_result
+
+    @staticmethod
+    def _part_cache_key(file_path: str, part: str) -> str:
+        """(abs path, size, mtime_ns) of a local file plus the part requested; no content hash."""
+        stat = os.stat(file_path)
+        return f"{part}|{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+    def _read_part(self, file_path: str, part: str, builder, empty: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
         """
-        Check for digital signatures in a PDF file using pypdf.
+        One result part from a single open (normally just the trailer scan),
+        without the content hash analyze() keys its cache on.
+        builder(reader, mapped) returns the part. Successful parts are cached
+        by (path, size, mtime) and part, so a repeat call for an unchanged
+        file is answered without opening it.
+        """
+        def error(message):
+            return dict({"status": "error", "message": message, "file_path": file_path,
+                         "analysis_timestamp": datetime.datetime.now().isoformat()}, **empty)
+
+        if not self._validate_file_path(file_path):
+            return error("File validation failed")
+        cache_key = None
+        if use_cache and self.cache is not None:
+            try:
+                cache_key = self._part_cache_key(file_path, part)
+            except OSError:
+                cache_key = None
+            cached = self.cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                self.logger.info(f"{part} served from cache for: {file_path}")
+                cached["file_path"] = file_path
+                return cached
+        try:
+            pdf_file, mapped, reader, _ = self._open_pdf(file_path)
+        except Exception as e:
+            self.logger.error(f"Failed to open PDF: {str(e)}")
+            return error(f"Error {part}: {str(e)}")
+        try:
+            result = builder(reader, mapped)
+            if cache_key and result.get("status") == "success":
+                self.cache.put(cache_key, result)
+            return result
+        except Exception as e:
+            self.logger.error(f"Error {part}: {str(e)}")
+            return error(f"Error {part}: {str(e)}")
+        finally:
+            self._close_pdf(pdf_file, mapped)
+
+    def extract_metadata(self, file_path: str) -> Optional[str]:
+        """
+        Extract metadata from a PDF file.
         
         Args:
             file_path (str): Path to the PDF file
             
         Returns:
-            Optional[str]: JSON string containing signature information or None if failed
+            Optional[str]: JSON string containing metadata
         """
-        try:
-            self.logger.info(f"Starting digital signature check for: {file_path}")
-            
-            # Validate file path
-            if not self._validate_file_path(file_path):
-                return json.dumps({
-                    "status": "error",
-                    "message": "File validation failed",
-                    "file_path": file_path,
-                    "signatures": []
-                }, indent=2)
-            
-            # Open PDF with pypdf
-            reader = PdfReader(file_path)
-            signatures = []
-            
-            # Check if AcroForm exists
-            if "/Root" not in reader.trailer:
-                self.logger.warning(f"No /Root found in PDF trailer: {file_path}")
-                return json.dumps({
-                    "status": "success",
-                    "message": "No /Root found in PDF trailer",
-                    "file_path": file_path,
-                    "signatures": []
-                }, indent=2)
-            
-            root = reader.trailer["/Root"]
-            if "/AcroForm" not in root:
-                self.logger.info(f"No AcroForm found in PDF: {file_path}")
-                return json.dumps({
-                    "status": "success",
-                    "message": "No AcroForm found in PDF",
-                    "file_path": file_path,
-                    "signatures": []
-                }, indent=2)
-            
-            acroform = root["/AcroForm"]
-            fields = acroform.get("/Fields", [])
-            
-            if not fields:
-                self.logger.info(f"No form fields found in PDF: {file_path}")
-                return json.dumps({
-                    "status": "success",
-                    "message": "No form fields found in PDF",
-                    "file_path": file_path,
-                    "signatures": []
-                }, indent=2)
-            
-            # Check each field for digital signatures
-            for i, field in enumerate(fields):
-                try:
-                    field_obj = field.get_object()
-                    field_type = field_obj.get("/FT")
-                    
-                    if field_type == "/Sig":
-                        self.logger.info(f"Digital signature field found at index {i}")
-                        
-                        signature_info = {
-                            "field_index": i,
-                            "field_name": str(field_obj.get("/T", "Unknown")) if field_obj.get("/T") else None,
-                            "field_type": str(field_type),
-                            "name": None,
-                            "location": None,
-                            "reason": None,
-                            "contact_info": None,
-                            "signing_date": None,
-                            "byte_range": None,
-                            "signature_present": False,
-                            "error": None
-                        }
-                        
-                        # Get signature dictionary
-                        sig_dict = field_obj.get("/V")
-                        if sig_dict:
-                            try:
-                                sig_obj = sig_dict.get_object()
-                                signature_info.update({
-                                    "name": str(sig_obj.get("/Name")) if sig_obj.get("/Name") else None,
-                                    "location": str(sig_obj.get("/Location")) if sig_obj.get("/Location") else None,
-                                    "reason": str(sig_obj.get("/Reason")) if sig_obj.get("/Reason") else None,
-                                    "contact_info": str(sig_obj.get("/ContactInfo")) if sig_obj.get("/ContactInfo") else None,
-                                    "signing_date": str(sig_obj.get("/M")) if sig_obj.get("/M") else None,
-                                    "byte_range": list(sig_obj.get("/ByteRange")) if sig_obj.get("/ByteRange") else None,
-                                    "signature_present": True
-                                })
-                                
-                                self.logger.info(f"Digital signature found: {signature_info.get('name', 'Unknown')}")
-                                        
-                            except Exception as e:
-                                self.logger.error(f"Error reading signature object: {str(e)}")
-                                signature_info["error"] = f"Could not read signature object: {str(e)}"
-                        else:
-                            self.logger.warning("Signature field found but no signature value present")
-                            signature_info["error"] = "No signature value present"
-                        
-                        signatures.append(signature_info)
-                    
-                except Exception as e:
-                    self.logger.error(f"Error processing field at index {i}: {str(e)}")
-                    continue
-            
-            # Create final JSON response
-            result = {
-                "status": "success",
-                "message": f"Found {len(signatures)} digital signature field(s)" if signatures else "No digital signature fields found",
-                "file_path": file_path,
-                "analysis_timestamp": datetime.datetime.now().isoformat(),
-                "total_signatures": len(signatures),
-                "signatures": signatures
-            }
-            
-            self.logger.info(f"Analysis complete: {len(signatures)} signature(s) found")
-            
-            return json.dumps(result, indent=2, ensure_ascii=False)
+        metadata_result = self._read_part(file_path, "extracting metadata",
+                                          lambda reader, mapped: self._metadata_result(reader, file_path), {"metadata": {}})
+        return json.dumps(metadata_result, indent=2, ensure_ascii=False)
+    
+    def check_digital_signatures(self, file_path: str, verify: bool = True) -> Optional[str]:
+        """
+        Check for digital signatures in a PDF file.
+        
+        Args:
+            file_path (str): Path to the PDF file
+            verify (bool): Check each signature's ByteRange digest and CMS signature
+                           (per-signature integrity, all_signatures_intact,
+                           incremental_updates_after_signing); False lists fields only
             
-        except Exception as e:
-            self.logger.error(f"Error checking digital signatures in {file_path}: {str(e)}")
-            error_result = {
-                "status": "error",
-                "message": f"Error checking digital signatures: {str(e)}",
-                "file_path": file_path,
-                "analysis_timestamp": datetime.datetime.now().isoformat(),
-                "signatures": []
-            }
-            return json.dumps(error_result, indent=2)
+        Returns:
+            Optional[str]: JSON string containing signature information
+        """
+        def build(reader, mapped):
+            signatures_result = self._signatures_result(reader, file_path)
+            if verify:
+                self._verify_signatures(mapped, signatures_result, self._revision_offsets(mapped))
+            return signatures_result
+
+        part = "checking digital signatures" if verify else "listing digital signatures"
+        signatures_result = self._read_part(file_path, part, build, {"signatures": []})
+        return json.dumps(signatures_result, indent=2, ensure_ascii=False)
     
     def analyze_pdf(self, file_path: str) -> str:
         """
@@ -339,59 +508,7 @@ class LeafletPDFSignAnalyzer:
         Returns:
             str: JSON string containing complete analysis results
         """
-        try:
-            self.logger.info(f"Starting complete PDF analysis for: {file_path}")
-            
-            analysis_result = {
-                "status": "success",
-                "message": "PDF analysis completed",
-                "file_path": file_path,
-                "analysis_timestamp": datetime.datetime.now().isoformat(),
-                "metadata_result": None,
-                "signatures_result": None,
-                "errors": []
-            }
-            
-            # Extract metadata
-            try:
-                metadata_json = self.extract_metadata(file_path)
-                if metadata_json:
-                    analysis_result["metadata_result"] = json.loads(metadata_json)
-            except Exception as e:
-                error_msg = f"Failed to extract metadata: {str(e)}"
-                self.logger.error(error_msg)
-                analysis_result["errors"].append(error_msg)
-            
-            # Check digital signatures
-            try:
-                signatures_json = self.check_digital_signatures(file_path)
-                if signatures_json:
-                    analysis_result["signatures_result"] = json.loads(signatures_json)
-            except Exception as e:
-                error_msg = f"Failed to check digital signatures: {str(e)}"
-                self.logger.error(error_msg)
-                analysis_result["errors"].append(error_msg)
-            
-            # Update status if there were errors
-            if analysis_result["errors"]:
-                analysis_result["status"] = "partial_success" if (analysis_result["metadata_result"] or analysis_result["signatures_result"]) else "error"
-                analysis_result["message"] = f"Analysis completed with {len(analysis_result['errors'])} error(s)"
-            
-            self.logger.info(f"PDF analysis completed for: {file_path}")
-            return json.dumps(analysis_result, indent=2, ensure_ascii=False)
-            
-        except Exception as e:
-            self.logger.error(f"Error during complete PDF analysis: {str(e)}")
-            error_result = {
-                "status": "error",
-                "message": f"Analysis failed: {str(e)}",
-                "file_path": file_path,
-                "analysis_timestamp": datetime.datetime.now().isoformat(),
-                "metadata_result": None,
-                "signatures_result": None,
-                "errors": [f"Analysis failed: {str(e)}"]
-            }
-            return json.dumps(error_result, indent=2)
+        return json.dumps(self.analyze(file_path), indent=2, ensure_ascii=False)
     
     def print_analysis_summary(self, analysis_json: str):
         """
@@ -508,4 +625,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -10,12 +10,130 @@ import logging
 from typing import Optional
 from pyhanko.sign import signers
 from pyhanko.pdf_utils.incremental_writer import IncrementalPdfFileWriter
-from pyhanko.sign.timestamps import HTTPTimeStamper
+from tsa_client import LeafletFailoverTimeStamper
 from urllib.parse import urlparse, urlunparse
 import base64
 import urllib.parse
 import hashlib
 import json
+import threading
+import time
+import tempfile
+import uuid
+import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from file_hashing import LeafletHashingWriter
+
+## Input PDFs up to this size stay in memory, larger ones spill to a temp file
+DOWNLOAD_SPOOL_MAX_SIZE = 16 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+## (connect, read) seconds
+DOWNLOAD_TIMEOUT = (10, 120)
+
+## Guards the shared per-day signer logger
+_LOGGER_LOCK = threading.Lock()
+
+_HTTP_SESSION = None
+_HTTP_SESSION_LOCK = threading.Lock()
+
+
+def http_session():
+    """Shared keep-alive session for input downloads, with retries on gateway errors."""
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None:
+        with _HTTP_SESSION_LOCK:
+            if _HTTP_SESSION is None:
+                session = requests.Session()
+                retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504),
+                              allowed_methods=frozenset(["GET"]))
+                adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=retry)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _HTTP_SESSION = session
+    return _HTTP_SESSION
+
+
+class LeafletSignerPool:
+    """
+    Process-wide cache of loaded PKCS#12 signers and TSA clients.
+
+    Signers are keyed by (absolute pfx path, file mtime, sha256 of the
+    password), so replacing the certificate file or changing the password
+    loads a fresh signer; entries also expire after ttl seconds. Timestampers
+    are keyed by their TSA URL list. invalidate() drops entries explicitly.
+    """
+    _signers = {}
+    _timestampers = {}
+    _lock = threading.Lock()
+    ttl = 3600
+
+    @classmethod
+    def configure(cls, ttl=3600):
+        cls.ttl = ttl
+
+    @staticmethod
+    def signer_key(pfx_path, pfx_password):
+        path = os.path.abspath(pfx_path)
+        return (path, os.path.getmtime(path), hashlib.sha256(pfx_password).hexdigest())
+
+    @classmethod
+    def get_signer(cls, pfx_path, pfx_password, logger=None):
+        """Loaded SimpleSigner for the pfx; load_pkcs12 only runs on a miss."""
+        if not os.path.exists(pfx_path):
+            raise FileNotFoundError(f"Certificate file not found: {pfx_path}")
+        key = cls.signer_key(pfx_path, pfx_password)
+        with cls._lock:
+            entry = cls._signers.get(key)
+            if entry is not None and time.monotonic() - entry[1] < cls.ttl:
+                return entry[0]
+
+        signer = signers.SimpleSigner.load_pkcs12(pfx_path, passphrase=pfx_password)
+        if signer is None:
+            raise ValueError(f"Unable to load certificate: {pfx_path}")
+        with cls._lock:
+            ## an older mtime or password of the same file is stale now
+            for stale in [k for k in cls._signers if k[0] == key[0]]:
+                del cls._signers[stale]
+            cls._signers[key] = (signer, time.monotonic())
+        if logger:
+            logger.info(f"Certificate loaded into signer pool: {key[0]}")
+        return signer
+
+    @classmethod
+    def get_timestamper(cls, tsa_url):
+        """Failover timestamper for a comma-separated (or list of) TSA URL(s), tried in order."""
+        urls = tuple(u.strip() for u in (tsa_url.split(",") if isinstance(tsa_url, str) else tsa_url) if u.strip())
+        with cls._lock:
+            timestamper = cls._timestampers.get(urls)
+            if timestamper is None:
+                timestamper = LeafletFailoverTimeStamper(list(urls))
+                cls._timestampers[urls] = timestamper
+        return timestamper
+
+    @classmethod
+    def invalidate(cls, pfx_path=None):
+        """Drop cached signers for pfx_path, or every signer and timestamper. Returns the count dropped."""
+        with cls._lock:
+            if pfx_path is None:
+                count = len(cls._signers) + len(cls._timestampers)
+                cls._signers.clear()
+                cls._timestampers.clear()
+                return count
+            path = os.path.abspath(pfx_path)
+            stale = [k for k in cls._signers if k[0] == path]
+            for key in stale:
+                del cls._signers[key]
+            return len(stale)
+
+    @classmethod
+    def stats(cls):
+        return {
+            "signers": [key[0] for key in cls._signers],
+            "timestampers": [timestamper.stats() for timestamper in cls._timestampers.values()],
+            "ttl": cls.ttl
+        }
 
 
 class LeafletPDFDigitalSigner:
@@ -27,7 +145,7 @@ class LeafletPDFDigitalSigner:
         self,
         pfx_path: str,
         pfx_password: bytes,
-        tsa_url: str = "http://timestamp.identrust.com",  ##"http://timestamp.digicert.com",
+        tsa_url: str = "http://timestamp.identrust.com,http://timestamp.digicert.com",
         field_name: str = "Leaflet_DOCID_1090000000",
         signer_name: str = "Leaflet-eSign",
         reason: str = "Digitally verifiable PDF sign approval",
@@ -42,7 +160,7 @@ class LeafletPDFDigitalSigner:
         Args:
             pfx_path (str): Path to the .pfx certificate file
             pfx_password (bytes): Password for the certificate as bytes
-            tsa_url (str): Timestamp Authority URL
+            tsa_url (str): Timestamp Authority URL, or comma-separated URLs tried in order
             field_name (str): Name of the signature field
             signer_name (str): Name of the signer
             reason (str): Reason for signing
@@ -90,37 +208,12 @@ class LeafletPDFDigitalSigner:
             log_filename = f"{current_date.strftime('%d%b%y')}_sign.log"
             log_filepath = os.path.join(log_dir, log_filename)
             
-            # Create logger
-            logger = logging.getLogger(f"{__name__}_{id(self)}")  # Unique logger per instance
-            logger.setLevel(logging.INFO)
-            
-            # Remove existing handlers to avoid duplicates
-            for handler in logger.handlers[:]:
-                logger.removeHandler(handler)
-            
-            # Create file handler
-            file_handler = logging.FileHandler(log_filepath, mode='a', encoding='utf-8')
-            file_handler.setLevel(logging.INFO)
-            
-            # Create console handler
-            console_handler = logging.StreamHandler()
-            console_handler.setLevel(logging.INFO)
-            
-            # Create formatter
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-                datefmt='%Y-%m-%d %H:%M:%S'
-            )
-            
-            file_handler.setFormatter(formatter)
-            console_handler.setFormatter(formatter)
-            
-            # Add handlers to logger
-            logger.addHandler(file_handler)
-            logger.addHandler(console_handler)
-            
-            logger.info(f"Logger initialized. Log file: {log_filepath}")
-            return logger
+            # One logger shared by every signer, reused while it still writes to today's file
+            logger = logging.getLogger(f"{__name__}_sign")
+            with _LOGGER_LOCK:
+                if any(getattr(handler, "baseFilename", None) == os.path.abspath(log_filepath) for handler in logger.handlers):
+                    return logger
+                return self._attach_handlers(logger, log_filepath)
             
         except Exception as e:
             # Fallback to basic logger if file logging fails
@@ -128,22 +221,48 @@ class LeafletPDFDigitalSigner:
             fallback_logger.error(f"Failed to setup file logging: {str(e)}")
             return fallback_logger
     
+    def _attach_handlers(self, logger, log_filepath):
+        """Replace the logger's handlers (closing them) with a file handler for log_filepath and a console handler."""
+        logger.setLevel(logging.INFO)
+        
+        # Remove existing handlers to avoid duplicates
+        for handler in logger.handlers[:]:
+            logger.removeHandler(handler)
+            handler.close()
+        
+        # Create file handler
+        file_handler = logging.FileHandler(log_filepath, mode='a', encoding='utf-8')
+        file_handler.setLevel(logging.INFO)
+        
+        # Create console handler
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.INFO)
+        
+        # Create formatter
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+        
+        file_handler.setFormatter(formatter)
+        console_handler.setFormatter(formatter)
+        
+        # Add handlers to logger
+        logger.addHandler(file_handler)
+        logger.addHandler(console_handler)
+        
+        logger.info(f"Logger initialized. Log file: {log_filepath}")
+        return logger
+    
     def _initialize_components(self):
-        """Initialize the signer and timestamper components."""
+        """Initialize the signer and timestamper components from the signer pool."""
         try:
-            # Validate certificate file exists
-            if not os.path.exists(self.pfx_path):
-                raise FileNotFoundError(f"Certificate file not found: {self.pfx_path}")
-            
-            # Load the certificate
-            self.signer = signers.SimpleSigner.load_pkcs12(
-                self.pfx_path,
-                passphrase=self.pfx_password
-            )
+            # Load the certificate (cached across requests)
+            self.signer = LeafletSignerPool.get_signer(self.pfx_path, self.pfx_password, self.logger)
             self.logger.info("Certificate loaded successfully")
             
-            # Initialize timestamper
-            self.timestamper = HTTPTimeStamper(self.tsa_url)
+            # Initialize timestamper (cached per TSA URL)
+            self.timestamper = LeafletSignerPool.get_timestamper(self.tsa_url)
             self.logger.info(f"Timestamper initialized with URL: {self.tsa_url}")
             
         except Exception as e:
@@ -202,31 +321,40 @@ class LeafletPDFDigitalSigner:
         return encoded
 
 
-    def download_file(self, file_url:str) -> str:
-        script_path = os.path.abspath(__file__)
-        script_dir = os.path.dirname(script_path)
+    def download_file(self, file_url:str):
+        """
+        Stream file_url through the shared session into a spooled temp file
+        (memory up to DOWNLOAD_SPOOL_MAX_SIZE, disk beyond). Returns the file
+        rewound to the start, or None when the download fails.
+        """
+        spool = tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_MAX_SIZE)
+        try:
+            with http_session().get(file_url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+                if response.status_code != 200:
+                    self.logger.error(f"Failed to download file, status code: {response.status_code}")
+                    spool.close()
+                    return None
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    spool.write(chunk)
+        except Exception:
+            spool.close()
+            raise
+        self.logger.info(f"File downloaded successfully: {file_url} ({spool.tell()} bytes)")
+        spool.seek(0)
+        return spool
 
-        folder_name = os.path.join(script_dir,"download_signpdf")
-        url = file_url
-        # Create folder if it doesn't exist
-        if not os.path.exists(folder_name):
-            os.makedirs(folder_name)
-        # Extract file name from URL or choose one explicitly
-        file_name = url.split("/")[-1] 
-        # Full path to save the file
-        file_path = os.path.join(folder_name, file_name)
-        
-        # Download file
-        response = requests.get(url)
-        if response.status_code == 200:
-            with open(file_path, "wb") as file:
-                file.write(response.content)
-
-            self.logger.info(f"File downloaded successfully to: {file_path}")
-            return file_path
-        else:
-            self.logger.error(f"Failed to download file, status code: {response.status_code}")
-        return None 
+    def open_input(self, input_pdf):
+        """
+        Binary stream and base name for input_pdf, which may be raw PDF bytes,
+        a local file path or a URL (downloaded without touching download_signpdf/).
+        """
+        if isinstance(input_pdf, (bytes, bytearray)):
+            return io.BytesIO(input_pdf), "input"
+        if os.path.isfile(input_pdf):
+            return open(input_pdf, "rb"), os.path.splitext(os.path.basename(input_pdf))[0]
+        input_url = self.url_fix(input_pdf)
+        base_name = os.path.splitext(urllib.parse.unquote(input_url.rsplit("/", 1)[-1]))[0]
+        return self.download_file(input_url), base_name
     
     def url_fix(self, input_file_url):
         url_raw = input_file_url
@@ -239,40 +367,78 @@ class LeafletPDFDigitalSigner:
         return final_url
         
 
-    def sign_process(self, input_pdf_path: str):
-        input_pdf_path = self.url_fix(input_pdf_path)
+    def signed_output_path(self, base_name):
+        """Unique path under download_signpdf/ so concurrent requests never collide."""
+        folder_name = os.path.join(os.path.dirname(os.path.abspath(__file__)), "download_signpdf")
+        os.makedirs(folder_name, exist_ok=True)
+        return os.path.join(folder_name, f"digital_sign_{base_name}_{uuid.uuid4().hex[:12]}.pdf")
+
+    def sign_input(self, input_pdf, include_blob=True):
+        """
+        Sign input_pdf (URL, local path or raw PDF bytes).
+        Returns {out_path, hashvalue[, blob_64encode]}; raises when the input
+        cannot be opened or signing fails.
+        """
+        in_stream, base_name = self.open_input(input_pdf)
+        if in_stream is None:
+            raise FileNotFoundError(f"in-file could not be opened {input_pdf if isinstance(input_pdf, str) else 'bytes'}")
+
+        out_path = self.signed_output_path(base_name)
+        ## hashes and base64 are computed while pyhanko writes, the output is never read back
+        hashing_writer = LeafletHashingWriter(algorithms=("md5", "sha256"), encode_base64=include_blob)
+        with in_stream:
+            resp = self.sign_pdf(in_stream, out_path, hashing_writer=hashing_writer)
+        if(resp == False):
+            raise RuntimeError("Unable sign")
+        result = {"out_path": out_path, "hashvalue": hashing_writer.hexdigest("md5"),
+                  "sha256": hashing_writer.hexdigest("sha256")}
+        if include_blob:
+            result["blob_64encode"] = hashing_writer.base64()
+        return result
+
+    def sign_batch(self, inputs, max_workers=4, include_blob=True):
+        """
+        Sign every input with this signer on a bounded thread pool.
+        Yields {index, status, ...sign_input result | error} as each file completes.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self.sign_input, item, include_blob): index
+                       for index, item in enumerate(inputs)}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    yield dict(future.result(), index=index, status="success")
+                except Exception as e:
+                    self.logger.error(f"Batch sign failed for input {index}: {str(e)}")
+                    yield {"index": index, "status": "error", "error": str(e)}
+
+    def sign_process(self, input_pdf):
+        """
+        Sign input_pdf (URL, local path or raw PDF bytes) and return the signed
+        file as json {blob_64encode, hashvalue}.
+        """
         try:
-            in_file = self.download_file(input_pdf_path)
-            if os.path.exists(in_file)==False:
-               self.logger.error(f"in-file does not exist {in_file}")
-               return ""
-
-            original_path = in_file
-            directory = os.path.dirname(original_path)
-            original_filename = os.path.basename(original_path)
-            base_name, ext = os.path.splitext(original_filename)
-            new_filename = f"digital_sign_{base_name}{ext}"
-            out_path = os.path.join(directory, new_filename)
-            resp = self.sign_pdf(in_file, out_path)
-            if(resp == False):
-                return "Unable sign"
-            url_upload = self.fetch_root_url(input_pdf_path)
-            blob_64encode = self.get_base64_file(out_path) #self.upload_file(url_upload, out_path, new_filename)
-            hashvalue = self.get_md5_hash(out_path)
-            return json.dumps({"blob_64encode": blob_64encode, "hashvalue": hashvalue})
+            result = self.sign_input(input_pdf)
+            return json.dumps({"blob_64encode": result["blob_64encode"], "hashvalue": result["hashvalue"]})
 
+        except FileNotFoundError as e:
+            self.logger.error(str(e))
+            return ""
+        except RuntimeError as e:
+            return str(e)
         except Exception as e:
             self.logger.error(f"Error during PDF sign-process: {str(e)}")
-            return jsonify({"error": str(e)})
+            return {"error": str(e)}
 
 
-    def sign_pdf(self, input_pdf_path: str, output_pdf_path: str) -> bool:
+    def sign_pdf(self, input_pdf_path: str, output_pdf_path: str, hashing_writer=None) -> bool:
         """
         Sign a PDF document.
         
         Args:
-            input_pdf_path (str): Path to the input PDF file
+            input_pdf_path (str): Path to the input PDF file, or an open binary stream
             output_pdf_path (str): Path where the signed PDF will be saved
+            hashing_writer (LeafletHashingWriter): Optional tee that hashes the output as it is written
             
         Returns:
             bool: True if signing was successful, False otherwise
@@ -280,7 +446,7 @@ class LeafletPDFDigitalSigner:
 
         try:
             # Validate input file
-            if not os.path.exists(input_pdf_path):
+            if isinstance(input_pdf_path, str) and not os.path.exists(input_pdf_path):
                 raise FileNotFoundError(f"Input PDF file not found: {input_pdf_path}")
             
             # Validate output directory exists
@@ -297,7 +463,8 @@ class LeafletPDFDigitalSigner:
             metadata = self._create_signature_metadata()
             
             # Sign the PDF
-            with open(input_pdf_path, "rb") as input_file:
+            input_source = open(input_pdf_path, "rb") if isinstance(input_pdf_path, str) else input_pdf_path
+            with input_source as input_file:
                 try:
                     writer = IncrementalPdfFileWriter(input_file)
                     pdf_signer = signers.PdfSigner(
@@ -307,6 +474,9 @@ class LeafletPDFDigitalSigner:
                     )
                     
                     with open(output_pdf_path, "wb") as output_file:
+                        if hashing_writer is not None:
+                            hashing_writer.sink = output_file
+                            output_file = hashing_writer
                         pdf_signer.sign_pdf(writer, output=output_file)
                     
                     self.logger.info(f"PDF signed successfully: {output_pdf_path}")
@@ -371,7 +541,7 @@ class LeafletPDFDigitalSigner:
         """
         try:
             # Test the new URL
-            test_timestamper = HTTPTimeStamper(new_tsa_url)
+            test_timestamper = LeafletSignerPool.get_timestamper(new_tsa_url)
             
             # If successful, update the instance variables
             self.tsa_url = new_tsa_url
@@ -382,17 +552,6 @@ class LeafletPDFDigitalSigner:
         except Exception as e:
             self.logger.error(f"Error updating timestamp URL: {str(e)}")
             raise
-    
-    def get_md5_hash(self, file_path):
-        try:
-            md5_hash = hashlib.md5()    
-            with open(file_path, 'rb') as f:        
-                while chunk := f.read(8192):
-                    md5_hash.update(chunk)
-            
-            return md5_hash.hexdigest()
-        except Exception as e:
-            return str(e)
 
 def from_shellcommand():
     """Example usage of the PDFDigitalSigner class."""
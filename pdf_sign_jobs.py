@@ -0,0 +1,165 @@
+#######################
+## Leaflet technology
+## Background job queue for PDF signing
+########################
+import threading
+import queue
+import uuid
+import time
+import json
+import os
+
+
+class LeafletSignJobQueue:
+    """
+    Bounded queue of signing jobs drained by a fixed pool of worker threads.
+
+    submit() returns a job id at once, or raises queue.Full when max_queue
+    jobs are already waiting, so request threads never wait on a download
+    or a slow TSA. With result_dir set every state change (queued, running,
+    completed, failed) is written there as <job id>.json, so another worker
+    process serving the status poll sees the job from the moment it is
+    queued. Records older than result_ttl seconds are pruned from memory and
+    from result_dir, whichever process wrote them, together with the file
+    named by the result's out_path.
+    """
+
+    def __init__(self, workers=4, max_queue=200, result_ttl=3600, result_dir=None, prune_interval=60, logger=None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self.result_dir = result_dir
+        self.prune_interval = prune_interval
+        self.logger = logger
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pruned_at = 0
+        if self.result_dir:
+            os.makedirs(self.result_dir, exist_ok=True)
+
+    def logs(self, msg):
+        if(self.logger):
+            self.logger.debug(msg)
+
+    def start(self):
+        """Start the worker threads once; submit() calls this lazily."""
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"sign-job-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, func, *args):
+        """Queue func(*args); its return value becomes the job result."""
+        self.start()
+        self._prune()
+        job_id = uuid.uuid4().hex
+        job = {"job_id": job_id, "status": "queued", "submitted": time.time()}
+        with self._lock:
+            self._jobs[job_id] = job
+        self._write(dict(job))
+        try:
+            self._queue.put_nowait((job_id, func, args))
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job_id]
+            self._remove(job_id)
+            raise
+        self.logs(f"[SIGN-JOB]: queued {job_id} ({self._queue.qsize()} waiting)")
+        return job_id
+
+    def _work(self):
+        while True:
+            job_id, func, args = self._queue.get()
+            self._update(job_id, status="running", started=time.time())
+            try:
+                result = func(*args)
+                self._update(job_id, status="completed", finished=time.time(), result=result)
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"[SIGN-JOB]: {job_id} failed: {e}")
+                self._update(job_id, status="failed", finished=time.time(), error=str(e))
+            finally:
+                self._queue.task_done()
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            job = dict(job)
+        self._write(job)
+
+    def _path(self, job_id):
+        return os.path.join(self.result_dir, f"{os.path.basename(job_id)}.json")
+
+    def _write(self, job):
+        if not self.result_dir:
+            return
+        try:
+            path = self._path(job["job_id"])
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(job, f)
+            os.replace(temp_path, path)
+        except Exception as e:
+            self.logs(f"[SIGN-JOB]: record write failed {job['job_id']}: {e}")
+
+    def _remove(self, job_id):
+        if not self.result_dir:
+            return
+        try:
+            os.remove(self._path(job_id))
+        except OSError:
+            pass
+
+    def status(self, job_id):
+        """Job dict (status, timestamps, result or error), or None when unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job, queue_depth=self._queue.qsize())
+        if self.result_dir:
+            try:
+                with open(self._path(job_id), 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return None
+        return None
+
+    def _prune(self):
+        now = time.time()
+        cutoff = now - self.result_ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if job.get("finished", cutoff + 1) < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+            if not self.result_dir or now - self._pruned_at < self.prune_interval:
+                return
+            self._pruned_at = now
+        ## by age on disk, so records of other processes and earlier runs go too
+        for entry in os.scandir(self.result_dir):
+            try:
+                if entry.stat().st_mtime >= cutoff:
+                    continue
+                if entry.name.endswith(".json"):
+                    with open(entry.path, 'r', encoding='utf-8') as f:
+                        out_path = (json.load(f).get("result") or {}).get("out_path")
+                    if out_path and os.path.exists(out_path):
+                        os.remove(out_path)
+                os.remove(entry.path)
+            except (OSError, ValueError, AttributeError) as e:
+                self.logs(f"[SIGN-JOB]: prune failed {entry.name}: {e}")
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"workers": self.workers, "max_queue": self.max_queue,
+                "queue_depth": self._queue.qsize(), "jobs": counts}
@@ -0,0 +1,187 @@
+#######################
+## Leaflet technology
+## ByteRange digest and CMS signature integrity checks for signed PDFs
+########################
+import hashlib
+from asn1crypto import cms
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding, ec, rsa, utils
+
+## Bytes after the signed range that still count as "end of file"
+TRAILING_WHITESPACE_ALLOWANCE = 32
+
+
+def _signed_range(data, byte_range):
+    """Validate /ByteRange [a b c d] against the file and return (a, b, c, d)."""
+    if not byte_range or len(byte_range) != 4:
+        raise ValueError("ByteRange must have four entries")
+    a, b, c, d = (int(n) for n in byte_range)
+    if a != 0 or b <= 0 or c < a + b or d < 0 or c + d > len(data):
+        raise ValueError(f"ByteRange {[a, b, c, d]} does not fit a {len(data)} byte file")
+    return a, b, c, d
+
+
+def _contents_from_gap(data, a, b, c):
+    """The hex /Contents string sits in the gap the ByteRange leaves out."""
+    gap = bytes(data[a + b:c]).strip()
+    if not (gap.startswith(b"<") and gap.endswith(b">")):
+        raise ValueError("ByteRange gap does not hold a hex /Contents string")
+    return bytes.fromhex(gap[1:-1].decode("ascii"))
+
+
+def _signer_certificate(signed_data, signer_info):
+    sid = signer_info["sid"]
+    for choice in signed_data["certificates"] or []:
+        if choice.name != "certificate":
+            continue
+        cert = choice.chosen
+        if sid.name == "issuer_and_serial_number":
+            if cert.serial_number == sid.chosen["serial_number"].native and cert.issuer == sid.chosen["issuer"]:
+                return cert
+        elif cert.key_identifier == sid.chosen.native:
+            return cert
+    return None
+
+
+class UnsupportedSignature(ValueError):
+    """A CMS form or key type these checks cannot evaluate; reported as unsupported, never as tampering."""
+
+
+def _hash_algorithm(digest_name):
+    try:
+        return getattr(hashes, digest_name.upper())()
+    except AttributeError:
+        raise UnsupportedSignature(f"Unsupported digest algorithm {digest_name}")
+
+
+def _verify_cms_signature(cert, signer_info, digest_name, content_digest):
+    """
+    With signed attributes the signature covers their DER SET OF; without
+    them it covers the content itself, checked against content_digest.
+    """
+    hash_algorithm = _hash_algorithm(digest_name)
+    signature = signer_info["signature"].native
+    if _signed_attrs(signer_info):
+        ## signed attributes are signed as an explicit SET OF, not the [0] IMPLICIT tag they are stored with
+        signed_attrs = signer_info["signed_attrs"].dump()
+        data, algorithm = b"\x31" + signed_attrs[1:], hash_algorithm
+    else:
+        data, algorithm = content_digest, utils.Prehashed(hash_algorithm)
+    public_key = x509.load_der_x509_certificate(cert.dump()).public_key()
+    signature_algo = signer_info["signature_algorithm"].signature_algo
+
+    if isinstance(public_key, rsa.RSAPublicKey):
+        if signature_algo == "rsassa_pss":
+            params = signer_info["signature_algorithm"]["parameters"]
+            public_key.verify(signature, data,
+                              padding.PSS(mgf=padding.MGF1(hash_algorithm), salt_length=params["salt_length"].native),
+                              algorithm)
+        else:
+            public_key.verify(signature, data, padding.PKCS1v15(), algorithm)
+    elif isinstance(public_key, ec.EllipticCurvePublicKey):
+        public_key.verify(signature, data, ec.ECDSA(algorithm))
+    else:
+        raise UnsupportedSignature(f"Unsupported signature key type {type(public_key).__name__}")
+
+
+def _signed_attrs(signer_info):
+    return signer_info["signed_attrs"].native or []
+
+
+def _range_digest(data, digest_name, a, b, c, end):
+    try:
+        digest = hashlib.new(digest_name)
+    except ValueError:
+        raise UnsupportedSignature(f"Unsupported digest algorithm {digest_name}")
+    with memoryview(data) as view:
+        digest.update(view[a:a + b])
+        digest.update(view[c:end])
+    return digest.digest()
+
+
+def verify_byte_range(data, byte_range, revision_offsets=None):
+    """
+    Integrity of one PDF signature over data (bytes or an mmap).
+
+    The two ByteRange segments are streamed into hashlib through
+    memoryview slices (no copy of the document). For detached CMS
+    (adbe.pkcs7.detached, ETSI.CAdES.detached) that digest is the signed
+    content; for adbe.pkcs7.sha1 the SHA-1 of the ranges is the embedded
+    content itself. The content digest is compared with the messageDigest
+    attribute, or, without signed attributes, checked by the signature
+    directly. Forms that cannot be evaluated set unsupported and leave
+    intact None. Bytes appended after the signed range are reported as
+    incremental updates (LTV/DSS, later signatures), not as tampering.
+    """
+    result = {
+        "digest_algorithm": None,
+        "digest_valid": None,
+        "signature_valid": None,
+        "intact": False,
+        "unsupported": None,
+        "signer": None,
+        "signed_bytes": None,
+        "covers_whole_document": None,
+        "incremental_updates_after_signing": None,
+        "error": None
+    }
+    try:
+        a, b, c, d = _signed_range(data, byte_range)
+        end = c + d
+        result["signed_bytes"] = b + d
+        trailing = bytes(data[end:end + TRAILING_WHITESPACE_ALLOWANCE + 1])
+        result["covers_whole_document"] = len(data) - end <= TRAILING_WHITESPACE_ALLOWANCE and not trailing.strip()
+        if revision_offsets is not None:
+            result["incremental_updates_after_signing"] = len([offset for offset in revision_offsets if offset > end])
+
+        content_info = cms.ContentInfo.load(_contents_from_gap(data, a, b, c), strict=False)
+        if content_info["content_type"].native != "signed_data":
+            raise UnsupportedSignature(f"Unsupported CMS content type {content_info['content_type'].native}")
+        signed_data = content_info["content"]
+        signer_info = signed_data["signer_infos"][0]
+        digest_name = signer_info["digest_algorithm"]["algorithm"].native
+        result["digest_algorithm"] = digest_name
+
+        embedded = signed_data["encap_content_info"]["content"].native
+        if embedded is not None:
+            ## adbe.pkcs7.sha1: the signed content is the SHA-1 of the ByteRange
+            document_digest_valid = bytes(embedded) == _range_digest(data, "sha1", a, b, c, end)
+            content_digest = hashlib.new(digest_name, bytes(embedded)).digest()
+        else:
+            document_digest_valid = None
+            content_digest = _range_digest(data, digest_name, a, b, c, end)
+
+        if _signed_attrs(signer_info):
+            message_digest = None
+            for attr in signer_info["signed_attrs"]:
+                if attr["type"].native == "message_digest":
+                    message_digest = attr["values"][0].native
+            if message_digest is None:
+                raise ValueError("CMS signer info has no messageDigest attribute")
+            result["digest_valid"] = content_digest == message_digest and document_digest_valid is not False
+        elif document_digest_valid is not None:
+            result["digest_valid"] = document_digest_valid
+
+        cert = _signer_certificate(signed_data, signer_info)
+        if cert is None:
+            raise UnsupportedSignature("Signer certificate is not embedded in the CMS")
+        result["signer"] = cert.subject.human_friendly
+        try:
+            _verify_cms_signature(cert, signer_info, digest_name, content_digest)
+            result["signature_valid"] = True
+        except UnsupportedSignature:
+            raise
+        except Exception as e:
+            result["signature_valid"] = False
+            result["error"] = f"Signature check failed: {str(e) or type(e).__name__}"
+        if result["digest_valid"] is None:
+            ## detached without signed attributes: the signature itself covers the document digest
+            result["digest_valid"] = result["signature_valid"]
+        result["intact"] = bool(result["digest_valid"] and result["signature_valid"])
+    except UnsupportedSignature as e:
+        result["intact"] = None
+        result["unsupported"] = str(e)
+    except Exception as e:
+        result["error"] = str(e)
+    return result
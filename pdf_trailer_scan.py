@@ -0,0 +1,475 @@
+#######################
+## Leaflet technology
+## Trailer-first PDF object access for signature discovery
+########################
+import zlib
+import re
+from pypdf._codecs import _pdfdoc_encoding
+
+PDF_WHITESPACE = b" \t\r\n\x0c\x00"
+PDF_DELIMITERS = b"()<>[]{}/%"
+XREF_ENTRY_SIZE = 20
+STARTXREF_WINDOW = 2048
+TRAILER_KEYS = ("/Root", "/Info", "/Encrypt", "/ID", "/Size")
+
+_OBJECT_HEADER = re.compile(rb"\s*(\d+)\s+(\d+)\s+obj")
+_XREF_SUBSECTION = re.compile(rb"\s*(\d+)\s+(\d+)[ \t]*\r?\n?")
+_XREF_ENTRY = re.compile(rb"(\d{10}) (\d{5}) ([nf])")
+_STARTXREF = re.compile(rb"startxref\s+(\d+)")
+FREE_ENTRY = ("f",)
+_ESCAPES = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b", ord("f"): b"\f",
+            ord("("): b"(", ord(")"): b")", ord("\\"): b"\\"}
+## PDFDocEncoding as str.translate over latin-1 text; bytes it leaves undefined stay latin-1
+_PDFDOC_TRANSLATE = {code: char for code, char in enumerate(_pdfdoc_encoding)
+                     if char != "\u0000" and char != chr(code)}
+
+
+class PdfScanError(Exception):
+    """The fast path cannot handle this file; callers fall back to a full parse."""
+
+
+class PdfName(str):
+    def get_object(self):
+        return self
+
+
+class PdfString(str):
+    """Text string decoded for display; original_bytes keeps the raw value."""
+    original_bytes = b""
+
+    def get_object(self):
+        return self
+
+
+class PdfArray(list):
+    def get_object(self):
+        return self
+
+
+class PdfRef:
+    __slots__ = ("num", "gen", "scanner")
+
+    def __init__(self, num, gen, scanner):
+        self.num = num
+        self.gen = gen
+        self.scanner = scanner
+
+    def get_object(self):
+        return self.scanner.resolve(self.num)
+
+    def __repr__(self):
+        return f"PdfRef({self.num}, {self.gen})"
+
+
+class PdfDict(dict):
+    """Dictionary whose item access resolves indirect references, like pypdf's."""
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        return value.get_object() if isinstance(value, PdfRef) else value
+
+    def get(self, key, default=None):
+        value = dict.get(self, key, default)
+        return value.get_object() if isinstance(value, PdfRef) else value
+
+    def get_object(self):
+        return self
+
+
+def _text(raw):
+    if raw.startswith(b"\xfe\xff"):
+        text = raw[2:].decode("utf-16-be", errors="replace")
+    elif raw.startswith(b"\xef\xbb\xbf"):
+        text = raw[3:].decode("utf-8", errors="replace")
+    else:
+        text = raw.decode("latin-1").translate(_PDFDOC_TRANSLATE)
+    value = PdfString(text)
+    value.original_bytes = bytes(raw)
+    return value
+
+
+def _png_unpredict(data, columns):
+    """Undo PNG row predictors (PDF /Predictor >= 10) with one byte per pixel."""
+    row_size = columns + 1
+    if len(data) % row_size:
+        raise PdfScanError("Predictor rows do not divide the xref stream")
+    previous = bytearray(columns)
+    out = bytearray()
+    for start in range(0, len(data), row_size):
+        kind = data[start]
+        row = bytearray(data[start + 1:start + row_size])
+        for i in range(columns):
+            left = row[i - 1] if i else 0
+            up = previous[i]
+            if kind == 1:
+                row[i] = (row[i] + left) & 0xFF
+            elif kind == 2:
+                row[i] = (row[i] + up) & 0xFF
+            elif kind == 3:
+                row[i] = (row[i] + ((left + up) >> 1)) & 0xFF
+            elif kind == 4:
+                upper_left = previous[i - 1] if i else 0
+                p = left + up - upper_left
+                pa, pb, pc = abs(p - left), abs(p - up), abs(p - upper_left)
+                row[i] = (row[i] + (left if pa <= pb and pa <= pc else up if pb <= pc else upper_left)) & 0xFF
+            elif kind != 0:
+                raise PdfScanError(f"Unknown PNG predictor {kind}")
+        out += row
+        previous = row
+    return bytes(out)
+
+
+class LeafletPDFTrailerScanner:
+    """
+    Reads a PDF from the end: startxref, then the cross-reference sections
+    (classic tables and xref streams, following /Prev), then only the
+    objects that are asked for.
+
+    Classic xref entries are read by offset arithmetic and xref streams
+    are decoded once, so resolving an object never walks the page tree or
+    the rest of the file. The scanner exposes the small part of the pypdf
+    PdfReader interface the sign analyzer uses (trailer, metadata,
+    pdf_header, is_encrypted). Anything unexpected raises PdfScanError.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._sections = []
+        self._objects = {}
+        self._object_streams = {}
+        self.trailer = PdfDict()
+        self._load_xref_chain()
+
+    ######## reader interface ########
+    @property
+    def metadata(self):
+        return self.trailer.get("/Info")
+
+    @property
+    def pdf_header(self):
+        start = self.data.find(b"%PDF-", 0, 1024)
+        if start == -1:
+            raise PdfScanError("No %PDF header")
+        return bytes(self.data[start:start + 8]).decode("latin-1")
+
+    @property
+    def is_encrypted(self):
+        return "/Encrypt" in self.trailer
+
+    def load_signature_objects(self):
+        """Resolve everything the analyzer will touch, so failures surface here."""
+        if self.is_encrypted:
+            raise PdfScanError("Encrypted PDF")
+        root = self.trailer["/Root"]
+        int(root["/Pages"]["/Count"])
+        info = self.metadata
+        if info is not None and not isinstance(info, PdfDict):
+            raise PdfScanError("/Info is not a dictionary")
+        acroform = root.get("/AcroForm")
+        if acroform:
+            for field in acroform.get("/Fields", []):
+                field_obj = field.get_object()
+                if field_obj.get("/FT") == "/Sig" and field_obj.get("/V"):
+                    field_obj.get("/V").get_object()
+        return self
+
+    ######## cross-reference ########
+    def _load_xref_chain(self):
+        tail_start = max(0, len(self.data) - STARTXREF_WINDOW)
+        matches = list(_STARTXREF.finditer(self.data, tail_start))
+        if not matches:
+            raise PdfScanError("No startxref")
+        offset = int(matches[-1].group(1))
+        seen = set()
+        while offset is not None:
+            if offset in seen or offset >= len(self.data):
+                raise PdfScanError(f"Bad xref offset {offset}")
+            seen.add(offset)
+            position = self._skip(self.data, offset)
+            if self.data[position:position + 4] == b"xref":
+                trailer = self._read_xref_table(position + 4)
+                if "/XRefStm" in trailer:
+                    ## hybrid file: the stream belongs to this table, not to the next section
+                    self._read_xref_stream(int(dict.__getitem__(trailer, "/XRefStm")))
+                    _, stream_section, _ = self._sections.pop()
+                    self._sections[-1] = ("table", self._sections[-1][1], stream_section)
+            else:
+                trailer = self._read_xref_stream(offset)
+            ## newest revision first, so older trailers only fill gaps
+            for key in TRAILER_KEYS:
+                if key in trailer:
+                    self.trailer.setdefault(key, dict.__getitem__(trailer, key))
+            offset = int(dict.__getitem__(trailer, "/Prev")) if "/Prev" in trailer else None
+        if "/Root" not in self.trailer:
+            raise PdfScanError("Trailer has no /Root")
+
+    def _read_xref_table(self, position):
+        subsections = []
+        while True:
+            position = self._skip(self.data, position)
+            if self.data[position:position + 7] == b"trailer":
+                position += 7
+                break
+            match = _XREF_SUBSECTION.match(self.data, position)
+            if not match:
+                raise PdfScanError("Malformed xref subsection")
+            first, count = int(match.group(1)), int(match.group(2))
+            entries_at = match.end()
+            subsections.append((first, count, entries_at))
+            position = entries_at + count * XREF_ENTRY_SIZE
+        self._sections.append(("table", subsections, None))
+        trailer, _ = self._parse(self.data, self._skip(self.data, position))
+        if not isinstance(trailer, PdfDict):
+            raise PdfScanError("Malformed trailer")
+        return trailer
+
+    def _read_xref_stream(self, offset):
+        num, stream_dict, raw = self._read_indirect(self.data, offset, expect_num=None)
+        if stream_dict.get("/Type") != "/XRef":
+            raise PdfScanError("startxref does not point at an xref section")
+        rows = self._decode_stream(stream_dict, raw)
+        widths = [int(w) for w in stream_dict["/W"]]
+        index = [int(n) for n in stream_dict.get("/Index", PdfArray([0, int(stream_dict["/Size"])]))]
+        self._sections.append(("stream", (widths, sum(widths), list(zip(index[0::2], index[1::2])), rows), None))
+        return stream_dict
+
+    def _lookup(self, num):
+        """
+        ('n', offset) or ('c', stream num, index), newest section first.
+
+        A hybrid table's own /XRefStm entries win over the table's free
+        entries: the table hides compressed objects from older readers.
+        Free and unlisted objects raise PdfScanError so the caller falls
+        back to a full parse instead of reading them as missing.
+        """
+        for kind, section, hybrid in self._sections:
+            entry = self._table_entry(section, num) if kind == "table" else self._stream_entry(section, num)
+            if hybrid is not None and (entry is None or entry is FREE_ENTRY):
+                stream_entry = self._stream_entry(hybrid, num)
+                if stream_entry is not None and stream_entry is not FREE_ENTRY:
+                    entry = stream_entry
+            if entry is FREE_ENTRY:
+                raise PdfScanError(f"Object {num} is marked free")
+            if entry is not None:
+                return entry
+        raise PdfScanError(f"Object {num} is not in any xref section")
+
+    def _table_entry(self, subsections, num):
+        for first, count, entries_at in subsections:
+            if first <= num < first + count:
+                at = entries_at + (num - first) * XREF_ENTRY_SIZE
+                match = _XREF_ENTRY.match(self.data, at)
+                if not match:
+                    raise PdfScanError(f"Malformed xref entry for object {num}")
+                if match.group(3) == b"f":
+                    return FREE_ENTRY
+                return ("n", int(match.group(1)))
+        return None
+
+    @staticmethod
+    def _stream_entry(section, num):
+        widths, row_size, ranges, rows = section
+        row_index = 0
+        for first, count in ranges:
+            if first <= num < first + count:
+                at = (row_index + num - first) * row_size
+                fields = []
+                for width in widths:
+                    fields.append(int.from_bytes(rows[at:at + width], "big") if width else None)
+                    at += width
+                kind_field = 1 if fields[0] is None else fields[0]
+                if kind_field == 0:
+                    return FREE_ENTRY
+                if kind_field == 1:
+                    return ("n", fields[1])
+                if kind_field == 2:
+                    return ("c", fields[1], fields[2])
+                raise PdfScanError(f"Unknown xref entry type {kind_field}")
+            row_index += count
+        return None
+
+    ######## objects ########
+    def resolve(self, num):
+        if num in self._objects:
+            return self._objects[num]
+        entry = self._lookup(num)
+        if entry[0] == "n":
+            _, value, raw = self._read_indirect(self.data, entry[1], expect_num=num)
+        else:
+            value = self._read_compressed(entry[1], entry[2], num)
+        self._objects[num] = value
+        return value
+
+    def _read_indirect(self, data, offset, expect_num):
+        match = _OBJECT_HEADER.match(data, offset)
+        if not match:
+            raise PdfScanError(f"No object header at {offset}")
+        num = int(match.group(1))
+        if expect_num is not None and num != expect_num:
+            raise PdfScanError(f"xref points object {expect_num} at object {num}")
+        value, position = self._parse(data, match.end())
+        raw = None
+        position = self._skip(data, position)
+        if isinstance(value, PdfDict) and data[position:position + 6] == b"stream":
+            position += 6
+            if data[position:position + 1] == b"\r":
+                position += 1
+            if data[position:position + 1] == b"\n":
+                position += 1
+            length = int(value["/Length"])
+            raw = bytes(data[position:position + length])
+        return num, value, raw
+
+    def _read_compressed(self, stream_num, index, num):
+        if stream_num not in self._object_streams:
+            entry = self._lookup(stream_num)
+            if entry[0] != "n":
+                raise PdfScanError(f"Object stream {stream_num} not found")
+            _, stream_dict, raw = self._read_indirect(self.data, entry[1], expect_num=stream_num)
+            content = self._decode_stream(stream_dict, raw)
+            header = [int(n) for n in content[:int(stream_dict["/First"])].split()]
+            self._object_streams[stream_num] = (content, int(stream_dict["/First"]), header)
+        content, first, header = self._object_streams[stream_num]
+        if header[index * 2] != num:
+            raise PdfScanError(f"Object stream {stream_num} does not hold object {num}")
+        value, _ = self._parse(content, first + header[index * 2 + 1])
+        return value
+
+    def _decode_stream(self, stream_dict, raw):
+        if raw is None:
+            raise PdfScanError("Stream data missing")
+        filters = stream_dict.get("/Filter")
+        filters = [filters] if isinstance(filters, str) else list(filters or [])
+        if filters not in ([], ["/FlateDecode"]):
+            raise PdfScanError(f"Unsupported stream filter {filters}")
+        data = zlib.decompress(raw) if filters else raw
+        params = stream_dict.get("/DecodeParms")
+        if isinstance(params, list):
+            params = params[0] if params else None
+        predictor = int(params.get("/Predictor", 1)) if params else 1
+        if predictor >= 10:
+            data = _png_unpredict(data, int(params.get("/Columns", 1)))
+        elif predictor != 1:
+            raise PdfScanError(f"Unsupported predictor {predictor}")
+        return data
+
+    ######## parser ########
+    @staticmethod
+    def _skip(data, position):
+        size = len(data)
+        while position < size:
+            c = data[position]
+            if c in PDF_WHITESPACE:
+                position += 1
+            elif c == 0x25:
+                while position < size and data[position] not in b"\r\n":
+                    position += 1
+            else:
+                break
+        return position
+
+    @staticmethod
+    def _token(data, position):
+        start = position
+        size = len(data)
+        while position < size and data[position] not in PDF_WHITESPACE and data[position] not in PDF_DELIMITERS:
+            position += 1
+        return bytes(data[start:position]), position
+
+    def _parse(self, data, position):
+        position = self._skip(data, position)
+        c = data[position:position + 1]
+        if c == b"<":
+            if data[position + 1:position + 2] == b"<":
+                return self._parse_dict(data, position + 2)
+            end = data.find(b">", position)
+            if end == -1:
+                raise PdfScanError("Unterminated hex string")
+            digits = re.sub(rb"\s", b"", bytes(data[position + 1:end]))
+            if len(digits) % 2:
+                digits += b"0"
+            return _text(bytes.fromhex(digits.decode("ascii"))), end + 1
+        if c == b"[":
+            items = PdfArray()
+            position += 1
+            while True:
+                position = self._skip(data, position)
+                if data[position:position + 1] == b"]":
+                    return items, position + 1
+                value, position = self._parse(data, position)
+                items.append(value)
+        if c == b"(":
+            return self._parse_literal(data, position + 1)
+        if c == b"/":
+            token, end = self._token(data, position + 1)
+            name = re.sub(rb"#([0-9A-Fa-f]{2})", lambda m: bytes([int(m.group(1), 16)]), token)
+            return PdfName("/" + name.decode("latin-1")), end
+        token, end = self._token(data, position)
+        if not token:
+            raise PdfScanError(f"Unexpected byte at {position}")
+        if token == b"true":
+            return True, end
+        if token == b"false":
+            return False, end
+        if token == b"null":
+            return None, end
+        try:
+            number = float(token) if b"." in token else int(token)
+        except ValueError:
+            raise PdfScanError(f"Unexpected token {token[:20]!r}")
+        if isinstance(number, int):
+            ## "num gen R" is an indirect reference
+            after = self._skip(data, end)
+            gen, gen_end = self._token(data, after)
+            if gen.isdigit():
+                r_at = self._skip(data, gen_end)
+                r, r_end = self._token(data, r_at)
+                if r == b"R":
+                    return PdfRef(number, int(gen), self), r_end
+        return number, end
+
+    def _parse_dict(self, data, position):
+        result = PdfDict()
+        while True:
+            position = self._skip(data, position)
+            if data[position:position + 2] == b">>":
+                return result, position + 2
+            key, position = self._parse(data, position)
+            if not isinstance(key, PdfName):
+                raise PdfScanError("Dictionary key is not a name")
+            value, position = self._parse(data, position)
+            dict.__setitem__(result, key, value)
+
+    @staticmethod
+    def _parse_literal(data, position):
+        out = bytearray()
+        depth = 1
+        size = len(data)
+        while position < size:
+            c = data[position]
+            if c == 0x5C:
+                position += 1
+                e = data[position]
+                if e in _ESCAPES:
+                    out += _ESCAPES[e]
+                elif 0x30 <= e <= 0x37:
+                    digits = bytes(data[position:position + 3])
+                    octal = re.match(rb"[0-7]{1,3}", digits).group(0)
+                    out.append(int(octal, 8) & 0xFF)
+                    position += len(octal) - 1
+                elif e == 0x0D:
+                    if data[position + 1:position + 2] == b"\n":
+                        position += 1
+                elif e != 0x0A:
+                    out.append(e)
+                position += 1
+                continue
+            if c == 0x28:
+                depth += 1
+            elif c == 0x29:
+                depth -= 1
+                if depth == 0:
+                    return _text(bytes(out)), position + 1
+            out.append(c)
+            position += 1
+        raise PdfScanError("Unterminated literal string")
@@ -0,0 +1,126 @@
+#######################
+## Leaflet technology
+## Bulk notary seal rendering across a process pool
+########################
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from seal_render_cache import seal_cache_key
+from notary_seal_circle import LeafletNotarySeal
+from notary_seal_rect import LeafletNotaryStampGeneratorCairo
+import threading
+import base64
+import os
+import re
+
+SEAL_STYLES = ("circle", "rectangle")
+SEAL_FORMATS = ("png", "svg", "pdf")
+
+
+def render_seal_spec(spec):
+    """
+    Render one seal spec (the /api/notary/seal-create body) to bytes.
+    Module level so it pickles into pool workers.
+    """
+    style = str(spec.get("sealStyle", "")).lower()
+    seal_format = spec.get("sealFormat", "png")
+    if style == "circle":
+        return LeafletNotarySeal().render_seal_bytes(spec["sealUpperText"], spec["sealLowerText"],
+                                                     spec["notaryId"], spec["expireOn"], seal_format=seal_format)
+    if style == "rectangle":
+        stamp = LeafletNotaryStampGeneratorCairo(width=600, height=250, seal_format=seal_format)
+        return stamp.render_seal_bytes(spec["sealUpperText"], spec["sealLowerText"],
+                                       spec["sealName"], spec["notaryId"], spec["expireOn"])
+    raise ValueError(f"Invalid style of seal: {spec.get('sealStyle')}")
+
+
+class LeafletSealRenderPool:
+    """
+    Process pool for CPU-bound Cairo seal rendering.
+
+    The pool is created on first use and shared by every request in the
+    process. Cache lookups and inserts stay in the parent; only misses are
+    sent to the workers, each of which keeps its own static layer and glyph
+    caches warm across tasks.
+    """
+    _executor = None
+    _max_workers = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, max_workers=None):
+        cls._max_workers = max_workers or None
+
+    @classmethod
+    def executor(cls):
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ProcessPoolExecutor(max_workers=cls._max_workers or os.cpu_count())
+        return cls._executor
+
+    @classmethod
+    def render_many(cls, specs, cache=None, logger=None, formats=SEAL_FORMATS):
+        """
+        Yield one result dict per spec as renders complete (cache hits first).
+        Result: index, status, sealStyle, sealFormat, notaryId, cached and
+        content (bytes) on success, or error on failure. Style and format are
+        checked before the cache is consulted or a render is submitted.
+        """
+        futures = {}
+        for index, spec in enumerate(specs):
+            result = {
+                "index": index,
+                "sealStyle": str(spec.get("sealStyle", "")).lower(),
+                "sealFormat": str(spec.get("sealFormat", "png")).lower(),
+                "notaryId": spec.get("notaryId"),
+                "cached": False
+            }
+            if result["sealStyle"] not in SEAL_STYLES:
+                yield dict(result, status="error", error=f"Invalid style of seal: {spec.get('sealStyle')}")
+                continue
+            if result["sealFormat"] not in formats:
+                yield dict(result, status="error", error=f"Invalid format of seal: {spec.get('sealFormat')}")
+                continue
+
+            spec = dict(spec, sealFormat=result["sealFormat"])
+            key = seal_cache_key(result["sealStyle"], spec)
+            content = cache.get(key, ext=result["sealFormat"]) if cache else None
+            if content is not None:
+                yield dict(result, status=str(True), cached=True, content=content)
+                continue
+            futures[cls.executor().submit(render_seal_spec, spec)] = (key, result)
+
+        for future in as_completed(futures):
+            key, result = futures[future]
+            try:
+                content = future.result()
+            except Exception as e:
+                if logger:
+                    logger.error(f"[SEAL-BULK]: seal {result['index']} failed: {e}")
+                yield dict(result, status="error", error=str(e))
+                continue
+            if cache:
+                cache.put(key, content, ext=result["sealFormat"])
+            yield dict(result, status=str(True), content=content)
+
+
+def archive_name(result):
+    """
+    ZIP entry name for a render_many result. notaryId and sealStyle come from
+    the request, so every part is cut down to [A-Za-z0-9_-]: no separators,
+    no "..", no absolute paths when the archive is extracted.
+    """
+    parts = [f"{result['index']:04d}"]
+    for key in ("sealStyle", "notaryId"):
+        part = re.sub(r"[^A-Za-z0-9_-]+", "_", str(result.get(key) or "")).strip("_")
+        parts.append(part or "seal")
+    extension = re.sub(r"[^a-z0-9]", "", str(result.get("sealFormat") or "png").lower()) or "png"
+    return "_".join(parts) + "." + extension
+
+
+def base64_result(result):
+    """NDJSON-ready copy of a render_many result with content as base64 outpath."""
+    result = dict(result)
+    content = result.pop("content", None)
+    if content is not None:
+        result["outpath"] = base64.b64encode(content).decode()
+    return result
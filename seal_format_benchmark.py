@@ -0,0 +1,56 @@
+#######################
+## Leaflet technology
+## Size / latency comparison of png, svg and pdf notary seals
+########################
+import time
+import json
+import sys
+from notary_seal_circle import LeafletNotarySeal
+from notary_seal_rect import LeafletNotaryStampGeneratorCairo
+
+SEAL_FORMATS = ("png", "svg", "pdf")
+SAMPLE_SEAL = {
+    "sealUpperText": "NOTARY PUBLIC",
+    "sealLowerText": "STATE OF TEXAS",
+    "sealName": "Mercedes Smith",
+    "notaryId": "1234567",
+    "expireOn": "05/01/2030"
+}
+
+
+def render_circle(seal_format, data):
+    return LeafletNotarySeal().render_seal_bytes(data["sealUpperText"], data["sealLowerText"],
+                                                 data["notaryId"], data["expireOn"], seal_format=seal_format)
+
+
+def render_rectangle(seal_format, data):
+    stamp = LeafletNotaryStampGeneratorCairo(width=600, height=250, seal_format=seal_format)
+    return stamp.render_seal_bytes(data["sealUpperText"], data["sealLowerText"],
+                                   data["sealName"], data["notaryId"], data["expireOn"])
+
+
+def compare_formats(rounds=50, data=SAMPLE_SEAL):
+    """
+    Render each style in each format `rounds` times (after one warm-up render,
+    so the static layer and glyph caches are hot) and report bytes and mean ms.
+    """
+    report = {}
+    for style, render in (("circle", render_circle), ("rectangle", render_rectangle)):
+        report[style] = {}
+        for seal_format in SEAL_FORMATS:
+            content = render(seal_format, data)
+            started = time.perf_counter()
+            for _ in range(rounds):
+                content = render(seal_format, data)
+            elapsed = time.perf_counter() - started
+            report[style][seal_format] = {
+                "bytes": len(content),
+                "mean_ms": round(elapsed * 1000 / rounds, 3)
+            }
+    return report
+
+
+if __name__ == "__main__":
+    ## python seal_format_benchmark.py [rounds]
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(json.dumps(compare_formats(rounds), indent=4))
@@ -0,0 +1,57 @@
+#######################
+## Leaflet technology
+## Shared glyph metrics for notary seal text layout
+########################
+import cairo
+import threading
+
+
+class LeafletGlyphMetrics:
+    """
+    Process-wide memo of Cairo glyph extents keyed by
+    (font family, slant, weight, size, char, vector).
+
+    Misses are measured on a private 1x1 scratch context with an identity
+    matrix, so the values do not depend on the caller's transformations and
+    can be shared by every seal render in the process. Image surfaces hint
+    font metrics and SVG/PDF surfaces do not, so vector=True measures on a
+    context with metric hinting off to match what the vector surface draws.
+    """
+    _cache = {}
+    _lock = threading.Lock()
+    _contexts = {}
+
+    @classmethod
+    def _scratch_context(cls, vector=False):
+        ctx = cls._contexts.get(vector)
+        if ctx is None:
+            ctx = cairo.Context(cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1))
+            if vector:
+                options = cairo.FontOptions()
+                options.set_hint_metrics(cairo.HINT_METRICS_OFF)
+                options.set_hint_style(cairo.HINT_STYLE_NONE)
+                ctx.set_font_options(options)
+            cls._contexts[vector] = ctx
+        return ctx
+
+    @classmethod
+    def text_extents(cls, font_family, font_weight, font_size, char, font_slant=cairo.FONT_SLANT_NORMAL, vector=False):
+        """cairo.TextExtents for one glyph (or short string), measured once per font and output kind."""
+        key = (font_family, font_slant, font_weight, font_size, char, vector)
+        extents = cls._cache.get(key)
+        if extents is not None:
+            return extents
+
+        with cls._lock:
+            extents = cls._cache.get(key)
+            if extents is None:
+                ctx = cls._scratch_context(vector)
+                ctx.select_font_face(font_family, font_slant, font_weight)
+                ctx.set_font_size(font_size)
+                extents = ctx.text_extents(char)
+                cls._cache[key] = extents
+        return extents
+
+    @classmethod
+    def size(cls):
+        return len(cls._cache)
@@ -0,0 +1,148 @@
+#######################
+## Leaflet technology
+## Content-addressed cache of rendered notary seals
+########################
+from collections import OrderedDict
+import hashlib
+import threading
+import json
+import os
+
+## Bump when seal drawing changes so old renders are not served
+SEAL_RENDER_VERSION = 3
+SEAL_KEY_FIELDS = ("sealUpperText", "sealLowerText", "sealName", "notaryId", "expireOn")
+## The only extensions a cache file may have; anything else never reaches a path
+SEAL_CACHE_EXTENSIONS = ("png", "svg", "pdf")
+
+
+def seal_cache_key(style, data, **options):
+    """
+    sha256 over the seal parameters and style. Text fields are keyed exactly
+    as they are rendered; spacing is drawn, so it is part of the key.
+    """
+    params = {}
+    for field in SEAL_KEY_FIELDS:
+        value = data.get(field)
+        if value is not None:
+            params[field] = str(value)
+    payload = {
+        "version": SEAL_RENDER_VERSION,
+        "style": str(style).strip().lower(),
+        "params": params,
+        "options": options
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class LeafletSealRenderCache:
+    """
+    Two-tier cache of rendered seal bytes.
+
+    Tier 1 is an in-memory LRU bounded by entry count and total bytes.
+    Tier 2 is a directory of <key>.<ext> files bounded by file count; the
+    oldest files are pruned first. A tier 2 hit is promoted to tier 1.
+    """
+
+    def __init__(self, cache_dir="seal_cache", max_items=256, max_bytes=64 * 1024 * 1024,
+                 max_disk_files=5000, logger=None):
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.max_disk_files = max_disk_files
+        self.logger = logger
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk_files = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._disk_files = len(os.listdir(self.cache_dir))
+
+    def logs(self, msg):
+        if(self.logger):
+            self.logger.debug(msg)
+
+    def _disk_path(self, key, ext):
+        if ext not in SEAL_CACHE_EXTENSIONS:
+            raise ValueError(f"Unsupported seal cache extension: {ext!r}")
+        return os.path.join(self.cache_dir, f"{key}.{ext}")
+
+    def get(self, key, ext="png"):
+        with self._lock:
+            content = self._items.get((key, ext))
+            if content is not None:
+                self._items.move_to_end((key, ext))
+                self.hits += 1
+                return content
+
+        if self.cache_dir:
+            path = self._disk_path(key, ext)
+            try:
+                with open(path, 'rb') as f:
+                    content = f.read()
+                self._put_memory(key, ext, content)
+                self.disk_hits += 1
+                return content
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                self.logs(f"[SEAL-CACHE]: disk read failed {path}: {e}")
+
+        self.misses += 1
+        return None
+
+    def _put_memory(self, key, ext, content):
+        with self._lock:
+            previous = self._items.pop((key, ext), None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._items[(key, ext)] = content
+            self._bytes += len(content)
+            while self._items and (len(self._items) > self.max_items or self._bytes > self.max_bytes):
+                old_key, old_content = self._items.popitem(last=False)
+                self._bytes -= len(old_content)
+
+    def put(self, key, content, ext="png"):
+        self._put_memory(key, ext, content)
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key, ext)
+        try:
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(content)
+            os.replace(temp_path, path)
+            self._disk_files += 1
+            if self._disk_files > self.max_disk_files:
+                self._prune_disk()
+        except Exception as e:
+            self.logs(f"[SEAL-CACHE]: disk write failed {path}: {e}")
+
+    def _prune_disk(self):
+        """Drop the oldest files until the disk tier is at 90% of its bound."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                entries.append((entry.stat().st_mtime, entry.path))
+        entries.sort()
+        excess = len(entries) - int(self.max_disk_files * 0.9)
+        for mtime, path in entries[:max(0, excess)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._disk_files = len(entries) - max(0, excess)
+        self.logs(f"[SEAL-CACHE]: pruned {max(0, excess)} file(s)")
+
+    def stats(self):
+        return {
+            "items": len(self._items),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "cache_dir": self.cache_dir
+        }
@@ -0,0 +1,76 @@
+#######################
+## Leaflet technology
+## Trailer scanner checks on hybrid-reference PDFs
+########################
+import zlib
+import pytest
+from pypdf.generic import create_string_object
+from pdf_trailer_scan import LeafletPDFTrailerScanner, PdfScanError, _text
+
+
+def hybrid_pdf():
+    """
+    Hybrid-reference file: the classic table marks the AcroForm (9) and the
+    signature field (5) free for pre-1.5 readers; the table's /XRefStm
+    stream holds them in object stream 7.
+    """
+    compressed = {9: b"<< /Fields [5 0 R] /SigFlags 3 >>",
+                  5: b"<< /FT /Sig /T (Signature1) /V 6 0 R >>"}
+    header, body = [], b""
+    for num, obj in compressed.items():
+        header.append(b"%d %d" % (num, len(body)))
+        body += obj + b" "
+    header = b" ".join(header) + b" "
+    objstm = zlib.compress(header + body)
+
+    out = bytearray(b"%PDF-1.5\n")
+    offsets = {}
+
+    def add(num, obj, stream=None):
+        offsets[num] = len(out)
+        out.extend(b"%d 0 obj\n" % num + obj)
+        if stream is not None:
+            out.extend(b"\nstream\n" + stream + b"\nendstream")
+        out.extend(b"\nendobj\n")
+
+    add(1, b"<< /Type /Catalog /Pages 2 0 R /AcroForm 9 0 R >>")
+    add(2, b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>")
+    add(3, b"<< /Type /Page /Parent 2 0 R >>")
+    add(6, b"<< /Type /Sig /Name (Jane Notary) /ByteRange [0 1 2 3] >>")
+    add(7, b"<< /Type /ObjStm /N 2 /First %d /Length %d /Filter /FlateDecode >>" % (len(header), len(objstm)), objstm)
+
+    rows = {5: bytes([2]) + (7).to_bytes(4, "big") + (1).to_bytes(2, "big"),
+            9: bytes([2]) + (7).to_bytes(4, "big") + (0).to_bytes(2, "big")}
+    xref_data = rows[5] + rows[9]
+    add(8, b"<< /Type /XRef /Size 10 /W [1 4 2] /Index [5 1 9 1] /Length %d >>" % len(xref_data), xref_data)
+
+    table_at = len(out)
+    out += b"xref\n0 10\n0000000000 65535 f \n"
+    for num in range(1, 10):
+        if num in offsets and num != 8:
+            out += b"%010d 00000 n \n" % offsets[num]
+        else:
+            out += b"0000000000 00001 f \n"
+    out += b"trailer\n<< /Size 10 /Root 1 0 R /XRefStm %d >>\nstartxref\n%d\n%%%%EOF\n" % (offsets[8], table_at)
+    return bytes(out)
+
+
+def test_hybrid_xref_resolves_objects_the_table_marks_free():
+    scanner = LeafletPDFTrailerScanner(hybrid_pdf()).load_signature_objects()
+    acroform = scanner.trailer["/Root"]["/AcroForm"]
+    field = acroform["/Fields"][0].get_object()
+    assert field["/FT"] == "/Sig"
+    assert field["/V"]["/Name"] == "Jane Notary"
+
+
+def test_free_or_unlisted_objects_raise():
+    scanner = LeafletPDFTrailerScanner(hybrid_pdf())
+    with pytest.raises(PdfScanError):
+        scanner.resolve(4)
+    with pytest.raises(PdfScanError):
+        scanner.resolve(42)
+
+
+def test_strings_without_bom_decode_as_pdfdocencoding():
+    raw = bytes(range(0x80, 0x9f)) + b"\x18\x1f\xa0 Jos\xe9"
+    assert _text(raw) == create_string_object(raw)
@@ -0,0 +1,210 @@
+#######################
+## Leaflet technology
+## RFC 3161 timestamp client with failover, and a local stand-in TSA
+########################
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from requests.adapters import HTTPAdapter
+from asn1crypto import tsp
+from pyhanko.sign.timestamps import TimeStamper, TimestampRequestError
+from pyhanko.sign.timestamps.dummy_client import DummyTimeStamper
+import requests
+import threading
+import asyncio
+import time
+import json
+import sys
+
+TSA_QUERY_CONTENT_TYPE = "application/timestamp-query"
+TSA_REPLY_CONTENT_TYPE = "application/timestamp-reply"
+
+
+class LeafletTSAEndpoint:
+    """
+    One TSA URL with latency tracking and a circuit breaker.
+
+    After failure_threshold consecutive failures the circuit opens and the
+    endpoint is skipped for reset_after seconds; then a single trial request
+    is let through (half-open) and its outcome closes or re-opens it.
+    """
+
+    def __init__(self, url, failure_threshold=3, reset_after=60):
+        self.url = url
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.requests = 0
+        self.errors = 0
+        self.latency_ms = None
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def available(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_after:
+                ## half-open: allow one trial, re-armed by record_failure
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self, elapsed):
+        with self._lock:
+            self.requests += 1
+            self.failures = 0
+            self.opened_at = None
+            ms = elapsed * 1000
+            ## exponentially weighted so one slow answer does not dominate
+            self.latency_ms = ms if self.latency_ms is None else 0.8 * self.latency_ms + 0.2 * ms
+
+    def record_failure(self, error):
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            self.failures += 1
+            self.last_error = str(error)
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        return {
+            "url": self.url,
+            "state": "closed" if self.opened_at is None else "open",
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "last_error": self.last_error
+        }
+
+
+class LeafletFailoverTimeStamper(TimeStamper):
+    """
+    pyhanko TimeStamper over several RFC 3161 endpoints.
+
+    Requests go through one pooled requests.Session with a (connect, read)
+    timeout. Endpoints are tried in the configured order, skipping any whose
+    circuit is open; the first granted response wins. When every endpoint
+    fails TimestampRequestError is raised with each endpoint's error.
+    """
+
+    def __init__(self, urls, timeout=(5, 15), failure_threshold=3, reset_after=60, logger=None):
+        super().__init__()
+        if isinstance(urls, str):
+            urls = [url.strip() for url in urls.split(",") if url.strip()]
+        self.endpoints = [LeafletTSAEndpoint(url, failure_threshold, reset_after) for url in urls]
+        self.timeout = timeout
+        self.logger = logger
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.endpoints) or 1, pool_maxsize=16)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def logs(self, msg):
+        if(self.logger):
+            self.logger.debug(msg)
+
+    def _post(self, endpoint, req):
+        response = self.session.post(endpoint.url, data=req.dump(), timeout=self.timeout,
+                                     headers={"Content-Type": TSA_QUERY_CONTENT_TYPE})
+        if response.status_code != 200:
+            raise TimestampRequestError(f"HTTP {response.status_code}")
+        if response.headers.get("Content-Type", "").split(";")[0].strip() != TSA_REPLY_CONTENT_TYPE:
+            raise TimestampRequestError(f"Unexpected content type {response.headers.get('Content-Type')}")
+        resp = tsp.TimeStampResp.load(response.content)
+        status = resp["status"]["status"].native
+        if status not in ("granted", "granted_with_mods"):
+            raise TimestampRequestError(f"TSA status {status}")
+        return resp
+
+    async def async_request_tsa_response(self, req: tsp.TimeStampReq) -> tsp.TimeStampResp:
+        errors = []
+        for endpoint in self.endpoints:
+            if not endpoint.available():
+                errors.append(f"{endpoint.url}: circuit open")
+                continue
+            started = time.perf_counter()
+            try:
+                resp = self._post(endpoint, req)
+            except Exception as e:
+                endpoint.record_failure(e)
+                errors.append(f"{endpoint.url}: {e}")
+                self.logs(f"[TSA]: {endpoint.url} failed: {e}")
+                continue
+            endpoint.record_success(time.perf_counter() - started)
+            return resp
+        raise TimestampRequestError("All TSA endpoints failed: " + "; ".join(errors))
+
+    def stats(self):
+        return [endpoint.stats() for endpoint in self.endpoints]
+
+
+class LeafletLocalTSAServer:
+    """
+    Local RFC 3161 stand-in for offline signing benchmarks.
+
+    Serves application/timestamp-query POSTs on 127.0.0.1 and answers them
+    with pyhanko's DummyTimeStamper using the given certificate and key (the
+    notary signer's own pair is fine for throughput tests; tokens are not
+    from a trusted TSA). Point LeafletFailoverTimeStamper at url.
+    """
+
+    def __init__(self, tsa_cert, tsa_key, host="127.0.0.1", port=0):
+        stamper = DummyTimeStamper(tsa_cert=tsa_cert, tsa_key=tsa_key)
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                req = tsp.TimeStampReq.load(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                body = asyncio.run(stamper.async_request_tsa_response(req)).dump()
+                self.send_response(200)
+                self.send_header("Content-Type", TSA_REPLY_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}/"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def benchmark_signing(pfx_path, pfx_password, input_pdf, rounds=20):
+    """Sign input_pdf `rounds` times against the local TSA stand-in and report throughput."""
+    from pdf_file_sign import LeafletPDFDigitalSigner, LeafletSignerPool
+
+    signer = LeafletSignerPool.get_signer(pfx_path, pfx_password)
+    server = LeafletLocalTSAServer(signer.signing_cert, signer.signing_key)
+    url = server.start()
+    try:
+        pdf_signer = LeafletPDFDigitalSigner(pfx_path=pfx_path, pfx_password=pfx_password, tsa_url=url)
+        with open(input_pdf, "rb") as f:
+            content = f.read()
+        started = time.perf_counter()
+        for _ in range(rounds):
+            pdf_signer.sign_input(content, include_blob=False)
+        elapsed = time.perf_counter() - started
+    finally:
+        server.stop()
+    return {
+        "rounds": rounds,
+        "seconds": round(elapsed, 3),
+        "signatures_per_second": round(rounds / elapsed, 2),
+        "tsa": pdf_signer.timestamper.stats()
+    }
+
+
+if __name__ == "__main__":
+    ## python tsa_client.py <pfx> <password> <input.pdf> [rounds]
+    rounds = int(sys.argv[4]) if len(sys.argv) > 4 else 20
+    print(json.dumps(benchmark_signing(sys.argv[1], sys.argv[2].encode("utf-8"), sys.argv[3], rounds), indent=4))